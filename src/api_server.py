@@ -25,18 +25,68 @@ Date: 2024
 
 import json
 import base64
+import asyncio
+import importlib.util
+import io
+import os
+import re
+import socket
 import time
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 import threading
-import queue
+import zlib
+import collections
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+# Project paths (resolved once at import, not per request)
+BASE_DIR = Path(__file__).resolve().parent.parent
+STATUS_FILE = BASE_DIR / ".detection_status.json"
+FACE_DB_PATH = BASE_DIR / "known_faces.json"
+FRAMES_DIR = BASE_DIR / "frames"
+
+# Minimum confidence accepted by /verified-person-alert
+VERIFIED_MIN_CONFIDENCE = 0.95
+
+# Per-kind settings for the POST alert endpoints (see _handle_alert)
+ALERT_TYPES = {
+    "verified": {
+        "filename_prefix": "verified_",
+        "event_type": "verified_person_detected",
+        "label": "verified_person",
+        "require_conf": VERIFIED_MIN_CONFIDENCE,
+        "message": "Verified person alert sent",
+        "metadata": {"confidence_threshold": VERIFIED_MIN_CONFIDENCE},
+    },
+    "unknown": {
+        "filename_prefix": "unknown_person_",
+        "event_type": "unknown_person_detected",
+        "label": "unknown_person",
+        "require_conf": None,
+        "message": "Unknown person alert sent",
+        "metadata": {"message": "Alien Detected"},
+    },
+}
+
+# Cache-Control for polled GET endpoints; clients revalidate with If-None-Match
+POLL_CACHE_CONTROL = "max-age=1, must-revalidate"
+
+# /detections responses with more items than this are serialized off the event loop
+DETECTIONS_OFFLOAD_THRESHOLD = 50
+
+# Characters replaced with "_" when a person name goes into a frame filename
+_SAFE_RE = re.compile(r"[ /]")
 
 # Try to import FastAPI
 try:
-    from fastapi import FastAPI, HTTPException, UploadFile, File, Form
-    from fastapi.responses import JSONResponse
-    from pydantic import BaseModel, Field
+    from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Request
+    from fastapi.responses import JSONResponse, Response
+    from fastapi.staticfiles import StaticFiles
+    from pydantic import BaseModel, Field, ConfigDict, ValidationError, field_validator
     import uvicorn
     import httpx
     FASTAPI_AVAILABLE = True
@@ -46,6 +96,121 @@ except ImportError:
     print("⚠️  Warning: FastAPI not available. API features will be disabled.")
     print("   Install with: python3 -m pip install --break-system-packages fastapi uvicorn httpx")
 
+# Try to import orjson (optional, C JSON encoder for webhook bodies and API responses)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Try to import OpenCV (optional - faster JPEG encoding for event frames; PIL is used otherwise)
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    cv2 = None
+    CV2_AVAILABLE = False
+
+
+def _json_bytes(data: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes, with orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data).encode("utf-8")
+
+
+def _json_loads(data) -> Any:
+    """
+    Parse JSON from str or bytes, with orjson when available
+    
+    Raises:
+        json.JSONDecodeError: On invalid JSON (orjson's error subclasses it)
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Parsed JSON files keyed by path, with the mtime they were read at
+_json_cache: Dict[Path, tuple] = {}
+_json_cache_lock = threading.Lock()
+
+
+def _cached_json_entry(path: Path) -> tuple:
+    """
+    Load a JSON file, re-parsing only when its mtime or size changes
+    
+    Args:
+        path: JSON file path
+        
+    Returns:
+        Tuple of (version, parsed JSON), where version is "<st_mtime_ns>-<st_size>";
+        the parsed data is shared - do not mutate
+        
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    st = path.stat()  # Single stat; no separate exists() check
+    version = f"{st.st_mtime_ns}-{st.st_size}"  # Nanoseconds: rewrites within a second still differ
+    with _json_cache_lock:
+        cached = _json_cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached
+    
+    with open(path, 'rb') as f:
+        entry = (version, _json_loads(f.read()))
+    with _json_cache_lock:
+        _json_cache[path] = entry
+    return entry
+
+
+def _cached_json(path: Path) -> Any:
+    """Load a JSON file through the mtime cache (see _cached_json_entry)"""
+    return _cached_json_entry(path)[1]
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header value against an ETag
+    
+    Args:
+        if_none_match: Raw header value (may list several tags, or be "*")
+        etag: Current ETag of the resource
+        
+    Returns:
+        True if the client's cached copy is still current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+def encode_jpeg(frame, quality: int = 85):
+    """
+    Encode an RGB (or grayscale) numpy frame as JPEG
+    
+    Args:
+        frame: numpy array (H, W, 3) RGB or (H, W)
+        quality: JPEG quality 1-100
+        
+    Returns:
+        Buffer with the JPEG data (1-D uint8 array from cv2, or a memoryview of
+        PIL's output), usable without a bytes copy
+    """
+    if CV2_AVAILABLE:
+        # cv2 expects BGR; swap so colours match the PIL path
+        bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR) if frame.ndim == 3 else frame
+        ok, buf = cv2.imencode(".jpg", bgr, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if ok:
+            return buf
+    
+    buffer = io.BytesIO()
+    Image.fromarray(frame).save(buffer, format="JPEG", quality=quality)
+    return buffer.getbuffer()
+
 # ============================================================================
 # EVENT MODELS (Pydantic schemas)
 # ============================================================================
@@ -53,6 +218,8 @@ except ImportError:
 if FASTAPI_AVAILABLE:
     class Detection(BaseModel):
         """Single detection object"""
+        model_config = ConfigDict(extra='ignore', frozen=True)
+        
         label: str = Field(..., description="Detection label (e.g., 'face', 'person')")
         confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence score 0-1")
         bbox: List[float] = Field(..., min_length=4, max_length=4, description="Bounding box [x1, y1, x2, y2]")
@@ -60,6 +227,8 @@ if FASTAPI_AVAILABLE:
     
     class DetectionEvent(BaseModel):
         """Detection event payload"""
+        model_config = ConfigDict(extra='ignore', frozen=True)
+        
         camera_id: str = Field(..., description="Camera identifier (e.g., 'frontdoor')")
         event_type: str = Field(..., description="Event type: 'person_detected', 'face_detected', 'training_clip_ready'")
         timestamp: str = Field(..., description="ISO 8601 timestamp")
@@ -78,6 +247,74 @@ if FASTAPI_AVAILABLE:
         duration: Optional[float] = Field(None, description="Clip duration in seconds")
         frame_count: Optional[int] = Field(None, description="Number of frames in clip")
         metadata: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional metadata")
+    
+    class AlertForm(BaseModel):
+        """Form fields shared by the alert endpoints (bbox and metadata arrive as JSON strings)"""
+        model_config = ConfigDict(extra='ignore')
+        
+        camera_id: str = Field(..., description="Camera identifier")
+        bbox: List[float] = Field(..., min_length=4, max_length=4, description="JSON [x1, y1, x2, y2]")
+        confidence: float = Field(..., ge=0.0, le=1.0, description="Detection confidence 0-1")
+        metadata: Dict[str, Any] = Field(default_factory=dict, description="Optional JSON object")
+        
+        @field_validator("bbox", mode="before")
+        @classmethod
+        def _parse_bbox(cls, value):
+            return _json_loads(value) if isinstance(value, (str, bytes)) else value
+        
+        @field_validator("metadata", mode="before")
+        @classmethod
+        def _parse_metadata(cls, value):
+            # Missing or malformed metadata is ignored rather than rejected
+            if not value:
+                return {}
+            if isinstance(value, (str, bytes)):
+                try:
+                    return _json_loads(value)
+                except json.JSONDecodeError:
+                    return {}
+            return value
+        
+        @classmethod
+        def validate_form(cls, **fields):
+            """Validate raw form values, turning validation errors into a 400 response"""
+            try:
+                return cls.model_validate(fields)
+            except ValidationError as e:
+                errors = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                raise HTTPException(status_code=400, detail=f"Invalid form data: {errors}")
+        
+        @classmethod
+        def as_form(
+            cls,
+            camera_id: str = Form(...),
+            bbox: str = Form(...),  # JSON string: [x1, y1, x2, y2]
+            confidence: float = Form(...),
+            metadata: Optional[str] = Form(None)  # JSON string
+        ):
+            """Dependency reading the fields from multipart form data"""
+            return cls.validate_form(camera_id=camera_id, bbox=bbox, confidence=confidence, metadata=metadata)
+    
+    class VerifiedAlertForm(AlertForm):
+        """Form fields of /verified-person-alert"""
+        person_name: str = Field(..., description="Recognized person")
+        date: Optional[str] = Field(None, description="YYYY-MM-DD (default: today)")
+        time_str: Optional[str] = Field(None, description="HH:MM:SS (default: now)")
+        
+        @classmethod
+        def as_form(
+            cls,
+            camera_id: str = Form(...),
+            person_name: str = Form(...),
+            bbox: str = Form(...),  # JSON string: [x1, y1, x2, y2]
+            confidence: float = Form(...),
+            date: Optional[str] = Form(None),  # Optional: YYYY-MM-DD format
+            time_str: Optional[str] = Form(None),  # Optional: HH:MM:SS format
+            metadata: Optional[str] = Form(None)  # JSON string
+        ):
+            """Dependency reading the fields from multipart form data"""
+            return cls.validate_form(camera_id=camera_id, person_name=person_name, bbox=bbox,
+                                     confidence=confidence, date=date, time_str=time_str, metadata=metadata)
 
 # ============================================================================
 # EVENT HANDLER (n8n Webhook Client)
@@ -86,20 +323,37 @@ if FASTAPI_AVAILABLE:
 class N8NWebhookClient:
     """Client for sending events to n8n webhooks"""
     
-    def __init__(self, webhook_url: Optional[str] = None, timeout: float = 5.0):
+    def __init__(self, webhook_url: Optional[str] = None, timeout: float = 5.0, max_pending: int = 64,
+                 max_workers: int = 4, batch_interval: float = 0.0, batch_max: int = 20):
         """
         Initialize n8n webhook client
         
         Args:
             webhook_url: n8n webhook URL (can be None if not configured)
             timeout: HTTP request timeout in seconds
+            max_pending: Maximum queued events; the oldest is dropped when full
+            max_workers: Maximum concurrent webhook POSTs
+            batch_interval: Seconds to collect further events after the first one and
+                POST them together as {"events": [...]}; 0 sends every event on its own
+            batch_max: Maximum events per batched POST
         """
         self.webhook_url = webhook_url
         self.timeout = timeout
         self.enabled = webhook_url is not None and webhook_url.strip() != ""
-        self.event_queue = queue.Queue()
+        # Bounded drop-oldest queue: a slow webhook cannot grow memory, and the
+        # freshest alerts are the ones kept
+        self.event_queue = collections.deque(maxlen=max_pending)
+        self._queue_cond = threading.Condition()
         self.worker_thread = None
         self.is_running = False
+        self._client = None  # Persistent httpx.Client, reused across events (keep-alive)
+        # Sends run on a small pool so one slow POST doesn't hold up the rest; the
+        # semaphore caps in-flight sends so the backlog stays in the drop-oldest deque
+        self.max_workers = max_workers
+        self._executor = None
+        self._send_slots = threading.BoundedSemaphore(max_workers)
+        self.batch_interval = batch_interval
+        self.batch_max = batch_max
         
         if self.enabled:
             print(f"✅ n8n webhook client initialized: {webhook_url}")
@@ -110,6 +364,17 @@ class N8NWebhookClient:
     def start_worker(self):
         """Start background worker thread for sending events"""
         if self.worker_thread is None or not self.worker_thread.is_alive():
+            if FASTAPI_AVAILABLE and self._client is None:
+                # No fixed Content-Type: httpx sets JSON or multipart per request.
+                # httpx.Client is thread-safe and shared by all send workers; every
+                # send holds a slot, so one kept-alive connection per slot is enough.
+                self._client = httpx.Client(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=self.max_workers,
+                                        max_keepalive_connections=self.max_workers)
+                )
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="n8n")
             self.is_running = True
             self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
             self.worker_thread.start()
@@ -120,30 +385,78 @@ class N8NWebhookClient:
         self.is_running = False
         if self.worker_thread and self.worker_thread.is_alive():
             self.worker_thread.join(timeout=2.0)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
     
     def _worker_loop(self):
-        """Background worker loop for sending events"""
+        """Background dispatcher loop: hands queued events to the send pool"""
         while self.is_running:
             try:
-                # Get event from queue (with timeout)
-                try:
-                    event_data = self.event_queue.get(timeout=1.0)
-                except queue.Empty:
+                # Wait for a free send slot first, so events wait in the bounded deque
+                if not self._send_slots.acquire(timeout=1.0):
                     continue
                 
-                # Send event to n8n
-                self._send_event(event_data)
+                # Get event from queue (with timeout)
+                with self._queue_cond:
+                    if not self.event_queue:
+                        self._queue_cond.wait(timeout=1.0)
+                    if not self.event_queue:
+                        self._send_slots.release()
+                        continue
+                    event_data, batchable = self.event_queue.popleft()
+                    if batchable and self.batch_interval > 0:
+                        event_data = self._collect_batch(event_data)
                 
-                # Mark task as done
-                self.event_queue.task_done()
+                # Send event to n8n on the pool
+                self._executor.submit(self._send_and_release, event_data)
                 
             except Exception as e:
+                self._send_slots.release()
                 print(f"⚠️  Error in n8n webhook worker: {e}")
     
+    def _collect_batch(self, first: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Gather batchable events arriving within batch_interval of the first one
+        
+        Must be called with _queue_cond held. Stops early at a non-batchable event,
+        which is left at the head of the queue to be sent on its own.
+        
+        Returns:
+            The first event unchanged if nothing else arrived, else {"events": [...]}
+        """
+        batch = [first]
+        deadline = time.monotonic() + self.batch_interval
+        while len(batch) < self.batch_max:
+            if self.event_queue:
+                if not self.event_queue[0][1]:
+                    break
+                batch.append(self.event_queue.popleft()[0])
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._queue_cond.wait(timeout=remaining)
+        return first if len(batch) == 1 else {"events": batch}
+    
+    def _send_and_release(self, event_data: Dict[str, Any]):
+        """Send one event on a pool thread and free its send slot"""
+        try:
+            self._send_event(event_data)
+        finally:
+            self._send_slots.release()
+    
     def _send_event(self, event_data: Dict[str, Any]):
         """
         Send event to n8n webhook
         
+        Events carrying raw JPEG bytes under "frame_bytes" are sent as
+        multipart/form-data: the rest of the event as a JSON "event" field and
+        the image as a "frame" file part. All other events are sent as JSON.
+        
         Args:
             event_data: Event data dictionary
         """
@@ -151,19 +464,29 @@ class N8NWebhookClient:
             return
         
         try:
-            if not FASTAPI_AVAILABLE:
+            if not FASTAPI_AVAILABLE or self._client is None:
                 print("⚠️  FastAPI/httpx not available - cannot send webhook")
                 return
             
-            import httpx
-            
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.post(
+            # Reuse the worker's client so the connection (and TLS session) stays open
+            frame_bytes = event_data.pop("frame_bytes", None)
+            body = _json_bytes(event_data)
+            if frame_bytes is not None:
+                response = self._client.post(
+                    self.webhook_url,
+                    data={"event": body.decode("utf-8")},
+                    files={"frame": ("frame.jpg", frame_bytes, "image/jpeg")}
+                )
+            else:
+                response = self._client.post(
                     self.webhook_url,
-                    json=event_data,
+                    content=body,
                     headers={"Content-Type": "application/json"}
                 )
-                response.raise_for_status()
+            response.raise_for_status()
+            if "events" in event_data:
+                print(f"✅ Batch of {len(event_data['events'])} events sent to n8n")
+            else:
                 print(f"✅ Event sent to n8n: {event_data.get('event_type', 'unknown')}")
         
         except httpx.TimeoutException:
@@ -173,29 +496,169 @@ class N8NWebhookClient:
         except Exception as e:
             print(f"⚠️  Error sending event to n8n: {e}")
     
-    def send_event(self, event_data: Dict[str, Any], async_send: bool = True):
+    def send_event(self, event_data: Dict[str, Any], async_send: bool = True, batch: bool = True):
         """
         Queue event for sending to n8n
         
         Args:
             event_data: Event data dictionary
             async_send: If True, queue for async sending. If False, send immediately (blocking)
+            batch: Allow coalescing with other events when batch_interval > 0. Events
+                with an attached frame are always sent on their own.
         """
         if not self.enabled:
             return
         
         if async_send:
-            try:
-                self.event_queue.put_nowait(event_data)
-            except queue.Full:
-                print("⚠️  Event queue full - dropping event")
+            batchable = batch and "frame_bytes" not in event_data
+            with self._queue_cond:
+                if len(self.event_queue) == self.event_queue.maxlen:
+                    print("⚠️  Event queue full - dropping oldest event")
+                self.event_queue.append((event_data, batchable))
+                self._queue_cond.notify()
         else:
-            self._send_event(event_data)
+            # Blocking sends share the slots, so in-flight POSTs never exceed max_workers
+            with self._send_slots:
+                self._send_event(event_data)
 
 # ============================================================================
 # FRAME STORAGE MANAGER
 # ============================================================================
 
+def _write_all(fd: int, data):
+    """Write a whole buffer to a file descriptor without copying it to bytes"""
+    view = memoryview(data).cast("B")
+    while view:
+        view = view[os.write(fd, view):]
+
+def _count_frames(directory: Path) -> int:
+    """Count .jpg files from the directory listing alone (no per-file stat)"""
+    try:
+        with os.scandir(directory) as it:
+            return sum(1 for entry in it if entry.name.endswith(".jpg"))
+    except FileNotFoundError:
+        return 0
+
+def _verified_name(filename: str) -> Optional[str]:
+    """Person name from verified_<name>_<YYYYmmdd>_<HHMMSS>_<micros>.jpg"""
+    parts = filename[:-len(".jpg")].split("_")
+    return "_".join(parts[1:-3]) if len(parts) >= 5 else None
+
+
+# Frame filename prefix -> (detection type, person-name extractor or None)
+FRAME_TYPE_PREFIXES = (
+    ("verified_", "verified_person", _verified_name),
+    ("unknown_person_", "unknown_person", None),
+)
+
+
+class FrameIndex:
+    """In-memory index of the .jpg frames in a directory, oldest first"""
+    
+    def __init__(self, directory: Path):
+        """
+        Build the index with a single directory scan
+        
+        Args:
+            directory: Frame directory
+        """
+        self.directory = directory
+        self._entries: Dict[str, tuple] = {}  # filename -> (filename, mtime, type, person_name)
+        self._lock = threading.Lock()
+        self._dir_mtime = None
+        self.rescan()
+    
+    @staticmethod
+    def _parse(filename: str) -> tuple:
+        """
+        Get the detection type and person name encoded in a frame filename
+        
+        Only used for files found on disk; frames saved by this process are
+        indexed with the metadata they were saved with.
+        
+        Returns:
+            tuple: (detection_type, person_name)
+        """
+        for prefix, detection_type, extract_name in FRAME_TYPE_PREFIXES:
+            if filename.startswith(prefix):
+                return detection_type, extract_name(filename) if extract_name else None
+        return "unknown", None
+    
+    def _dir_stat(self):
+        """Directory mtime (changes whenever a file is added, renamed or removed)"""
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    def rescan(self):
+        """Rebuild the index from the directory"""
+        dir_mtime = self._dir_stat()
+        files = []
+        if dir_mtime is not None:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".jpg"):
+                        try:
+                            files.append((entry.name, entry.stat().st_mtime))
+                        except FileNotFoundError:
+                            pass
+        files.sort(key=lambda f: f[1])
+        entries = {name: (name, mtime) + self._parse(name) for name, mtime in files}
+        with self._lock:
+            self._entries = entries
+            self._dir_mtime = dir_mtime
+    
+    def _refresh(self):
+        """Rescan only if something other than this index changed the directory"""
+        if self._dir_stat() != self._dir_mtime:
+            self.rescan()
+    
+    def add(self, filename: str, mtime: float, meta: Optional[tuple] = None):
+        """
+        Record a frame written by this process
+        
+        Args:
+            filename: Frame filename
+            mtime: Modification time
+            meta: (detection_type, person_name), or None to parse it from the filename
+        """
+        entry = (filename, mtime) + (meta if meta is not None else self._parse(filename))
+        with self._lock:
+            self._entries.pop(filename, None)
+            self._entries[filename] = entry
+            self._dir_mtime = self._dir_stat()
+    
+    def remove(self, filenames):
+        """Forget frames deleted by this process"""
+        with self._lock:
+            for filename in filenames:
+                self._entries.pop(filename, None)
+            self._dir_mtime = self._dir_stat()
+    
+    def names(self) -> List[str]:
+        """Filenames, oldest first"""
+        with self._lock:
+            return list(self._entries)
+    
+    def recent(self, limit: int) -> List[tuple]:
+        """
+        Newest frames first
+        
+        Args:
+            limit: Maximum number of entries
+            
+        Returns:
+            List of (filename, mtime, detection_type, person_name)
+        """
+        self._refresh()
+        with self._lock:
+            return list(itertools.islice(reversed(self._entries.values()), max(limit, 0)))
+    
+    def __len__(self):
+        self._refresh()
+        return len(self._entries)
+
 class FrameStorageManager:
     """Manages storage and URL generation for frames"""
     
@@ -209,43 +672,108 @@ class FrameStorageManager:
         """
         # Use default storage directory if not provided
         if storage_dir is None:
-            BASE_DIR = Path(__file__).parent.parent
-            storage_dir = str(BASE_DIR / "frames")
+            storage_dir = str(FRAMES_DIR)
         
         self.storage_dir = Path(storage_dir)
         self.base_url = base_url
         self.storage_dir.mkdir(exist_ok=True)
+        # Prefixes joined once, so each save is a plain string concat
+        self._path_prefix = os.path.join(str(self.storage_dir), "")
+        self._url_prefix = (base_url.rstrip('/') + '/') if base_url else None
         
         # Clean old frames periodically (keep last 100)
         self.max_frames = 100
+        
+        # All frames (for /status and /detections), scanned once here and then kept
+        # up to date by save_frame/_cleanup_old_frames
+        self.index = FrameIndex(self.storage_dir)
+        
+        # Auto-named frames in save order, so cleanup never has to list the directory
+        self._saved = collections.deque(
+            self._path_prefix + name for name in self.index.names() if name.startswith("frame_")
+        )
+        self._saved_lock = threading.Lock()
+        self._seq = itertools.count(int(time.time() * 1000))  # Unique, increasing frame numbers
+        self._cleanup_old_frames()
     
-    def save_frame(self, frame_data: bytes, filename: Optional[str] = None) -> tuple[str, Optional[str]]:
+    def save_frame(self, frame_data, filename: Optional[str] = None,
+                   meta: Optional[tuple] = None) -> tuple[str, Optional[str]]:
         """
         Save frame to disk and return filename and URL
         
+        The file is written under a temporary name and then renamed, so readers
+        never see a partially written frame.
+        
+        Args:
+            frame_data: Encoded image data (bytes or any buffer, e.g. a memoryview
+                of a BytesIO or numpy array - written without an extra copy)
+            filename: Optional filename (auto-generated if None)
+            meta: Optional (detection_type, person_name) for the frame index
+            
+        Returns:
+            Tuple of (filename, url)
+        """
+        return self._save(filename, lambda fd: _write_all(fd, frame_data), meta)
+    
+    def save_frame_stream(self, src, filename: Optional[str] = None,
+                          meta: Optional[tuple] = None, chunk_size: int = 65536) -> tuple[str, Optional[str]]:
+        """
+        Save a frame by copying it from a file object in fixed-size chunks
+        
+        Memory use stays at one chunk regardless of the image size (e.g. for
+        UploadFile.file, which Starlette has already spooled).
+        
         Args:
-            frame_data: Frame image data (bytes)
+            src: Binary file object positioned at the start of the image
             filename: Optional filename (auto-generated if None)
+            meta: Optional (detection_type, person_name) for the frame index
+            chunk_size: Bytes per read/write
             
+        Returns:
+            Tuple of (filename, url)
+        """
+        def copy(fd):
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                _write_all(fd, chunk)
+        
+        return self._save(filename, copy, meta)
+    
+    def _save(self, filename: Optional[str], write, meta: Optional[tuple] = None) -> tuple[str, Optional[str]]:
+        """
+        Write a frame via write(fd) to a temporary file, rename it into place and index it
+        
         Returns:
             Tuple of (filename, url)
         """
         if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            filename = f"frame_{timestamp}.jpg"
+            filename = f"frame_{next(self._seq)}.jpg"
         
-        filepath = self.storage_dir / filename
+        filepath = self._path_prefix + filename
         
         try:
-            filepath.write_bytes(frame_data)
+            tmp_path = filepath + ".tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                write(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, filepath)
+            if filename.endswith(".jpg"):
+                self.index.add(filename, time.time(), meta)
             
             # Generate URL if base_url is configured
             url = None
-            if self.base_url:
-                url = f"{self.base_url.rstrip('/')}/{filename}"
+            if self._url_prefix:
+                url = self._url_prefix + filename
             
             # Clean old frames if needed
-            self._cleanup_old_frames()
+            if filename.startswith("frame_") and filename.endswith(".jpg"):
+                with self._saved_lock:
+                    self._saved.append(filepath)
+                self._cleanup_old_frames()
             
             return filename, url
         
@@ -256,92 +784,145 @@ class FrameStorageManager:
     def _cleanup_old_frames(self):
         """Remove old frames if exceeding max_frames limit"""
         try:
-            frames = sorted(self.storage_dir.glob("frame_*.jpg"), key=lambda p: p.stat().st_mtime)
-            if len(frames) > self.max_frames:
-                for frame_file in frames[:-self.max_frames]:
-                    frame_file.unlink()
+            with self._saved_lock:
+                stale = [self._saved.popleft() for _ in range(len(self._saved) - self.max_frames)]
+            for frame_file in stale:
+                try:
+                    os.unlink(frame_file)
+                except FileNotFoundError:
+                    pass
+            if stale:
+                self.index.remove(f[len(self._path_prefix):] for f in stale)
         except Exception as e:
             print(f"⚠️  Error cleaning up frames: {e}")
 
+# Global instances (set by initialize_api_server)
+webhook_client: Optional[N8NWebhookClient] = None
+frame_storage: Optional[FrameStorageManager] = None
+_api_server = None  # uvicorn.Server, for stop_api_server()
+_api_server_thread: Optional[threading.Thread] = None
+
 # ============================================================================
 # FASTAPI APPLICATION
 # ============================================================================
 
 if FASTAPI_AVAILABLE:
+    # ORJSONResponse serializes dict responses in C; falls back to the stdlib encoder
+    if ORJSON_AVAILABLE:
+        from fastapi.responses import ORJSONResponse as DefaultResponse
+    else:
+        DefaultResponse = JSONResponse
+    
     app = FastAPI(
         title="Raspberry Pi Face Detection API",
         description="API for sending detection events to n8n",
-        version="1.0.0"
+        version="1.0.0",
+        default_response_class=DefaultResponse
     )
     
-    # Global instances
-    webhook_client: Optional[N8NWebhookClient] = None
-    frame_storage: Optional[FrameStorageManager] = None
     
+    def _cacheable_response(request: Request, body: bytes) -> Response:
+        """
+        Return a JSON body with Cache-Control and a content-derived ETag
+        
+        Args:
+            request: Incoming request (for If-None-Match)
+            body: Serialized JSON body
+            
+        Returns:
+            304 Not Modified if the client already has this body, else the body
+        """
+        headers = {"ETag": f'W/"{zlib.crc32(body):08x}"', "Cache-Control": POLL_CACHE_CONTROL}
+        if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
     
     @app.get("/health")
-    async def health_check():
+    async def health_check(request: Request):
         """Health check endpoint"""
-        return {
+        return _cacheable_response(request, _json_bytes({
             "status": "healthy",
             "webhook_enabled": webhook_client.enabled if webhook_client else False,
             "webhook_url": webhook_client.webhook_url if webhook_client else None
-        }
+        }))
     
-    @app.get("/status")
-    async def get_status_simple():
+    def _read_status_sync() -> Dict[str, Any]:
         """
-        Simple GET endpoint for system status (alternative to POST /command)
+        Read detector status, enrolled face count and stored frame count from disk
         
-        Useful for n8n HTTP Request nodes using GET method.
-        Returns basic system status without requiring POST body.
-        """
-        BASE_DIR = Path(__file__).parent.parent
+        Blocking file I/O - call through asyncio.to_thread from async routes.
         
+        Returns:
+            Dict with "running", "enrolled_faces", "frames_stored" and "etag"
+            (derived from the two JSON files' mtimes and sizes, the frame count and
+            the frame directory's mtime)
+        """
         # Check if detection system is running
-        status_file = BASE_DIR / ".detection_status.json"
         is_running = False
-        if status_file.exists():
-            try:
-                with open(status_file, 'r') as f:
-                    status_data = json.load(f)
-                    is_running = status_data.get("running", False)
-            except:
-                pass
+        status_version = 0
+        try:
+            status_version, status = _cached_json_entry(STATUS_FILE)
+            is_running = status.get("running", False)
+        except:
+            pass
         
         # Get face database info
-        face_db_path = BASE_DIR / "known_faces.json"
         enrolled_count = 0
-        if face_db_path.exists():
-            try:
-                with open(face_db_path, 'r') as f:
-                    face_db = json.load(f)
-                    enrolled_count = len(face_db)
-            except:
-                pass
-        
-        # Get frame count
-        frames_dir = BASE_DIR / "frames"
-        frame_count = 0
-        if frames_dir.exists():
-            frame_count = len(list(frames_dir.glob("*.jpg")))
+        face_version = 0
+        try:
+            face_version, faces = _cached_json_entry(FACE_DB_PATH)
+            enrolled_count = len(faces)
+        except:
+            pass
+        
+        # Get frame count (from the storage index when this process owns it)
+        frame_count = len(frame_storage.index) if frame_storage else _count_frames(FRAMES_DIR)
+        
+        # The directory mtime changes on every frame saved or removed, even when the count doesn't
+        try:
+            frames_version = os.stat(frame_storage.storage_dir if frame_storage else FRAMES_DIR).st_mtime_ns
+        except FileNotFoundError:
+            frames_version = 0
         
         return {
+            "running": is_running,
+            "enrolled_faces": enrolled_count,
+            "frames_stored": frame_count,
+            "etag": f'W/"{status_version}-{face_version}-{frame_count}-{frames_version}"'
+        }
+    
+    @app.get("/status")
+    async def get_status_simple(request: Request):
+        """
+        Simple GET endpoint for system status (alternative to POST /command)
+        
+        Useful for n8n HTTP Request nodes using GET method.
+        Returns basic system status without requiring POST body.
+        Repeat polls sending If-None-Match get 304 while nothing has changed.
+        """
+        # Disk reads run in a worker thread so concurrent requests aren't serialized
+        disk = await asyncio.to_thread(_read_status_sync)
+        
+        headers = {"ETag": disk["etag"], "Cache-Control": POLL_CACHE_CONTROL}
+        if _etag_matches(request.headers.get("if-none-match"), disk["etag"]):
+            return Response(status_code=304, headers=headers)
+        
+        return DefaultResponse({
             "status": "success",
             "system": {
-                "running": is_running,
+                "running": disk["running"],
                 "api_version": "1.0.0",
                 "webhook_enabled": webhook_client.enabled if webhook_client else False
             },
             "face_recognition": {
                 "enabled": True,
-                "enrolled_faces": enrolled_count
+                "enrolled_faces": disk["enrolled_faces"]
             },
             "storage": {
-                "frames_stored": frame_count
+                "frames_stored": disk["frames_stored"]
             },
             "timestamp": datetime.now().isoformat()
-        }
+        }, headers=headers)
     
     @app.get("/detections")
     async def get_recent_detections_simple(
@@ -357,176 +938,183 @@ if FASTAPI_AVAILABLE:
         
         Useful for n8n HTTP Request nodes using GET method.
         """
-        BASE_DIR = Path(__file__).parent.parent
-        frames_dir = BASE_DIR / "frames"
+        # Directory scan and stats run in a worker thread
+        detections = await asyncio.to_thread(_list_detections_sync, limit, event_type)
         
-        detections = []
-        if frames_dir.exists():
-            frame_files = sorted(
-                frames_dir.glob("*.jpg"),
-                key=lambda p: p.stat().st_mtime,
-                reverse=True
-            )[:limit]
-            
-            for frame_file in frame_files:
-                filename = frame_file.name
-                mtime = frame_file.stat().st_mtime
-                
-                detection_type = "unknown"
-                person_name = None
-                
-                if filename.startswith("verified_"):
-                    detection_type = "verified_person"
-                    parts = filename.replace(".jpg", "").split("_")
-                    if len(parts) >= 3:
-                        person_name = "_".join(parts[1:-2])
-                elif filename.startswith("unknown_person_"):
-                    detection_type = "unknown_person"
-                
-                if event_type is None or detection_type == event_type:
-                    frame_url = None
-                    if frame_storage and frame_storage.base_url:
-                        frame_url = f"{frame_storage.base_url}/{filename}"
-                    
-                    detections.append({
-                        "type": detection_type,
-                        "person_name": person_name,
-                        "frame_filename": filename,
-                        "frame_url": frame_url,
-                        "timestamp": datetime.fromtimestamp(mtime).isoformat()
-                    })
-        
-        return {
+        payload = {
             "status": "success",
             "detections": detections,
             "count": len(detections),
             "limit": limit,
             "event_type_filter": event_type
         }
+        
+        # Large dumps are serialized in a worker thread so the loop keeps serving;
+        # small ones aren't worth the thread hop
+        if len(detections) > DETECTIONS_OFFLOAD_THRESHOLD:
+            body = await asyncio.to_thread(_json_bytes, payload)
+            return Response(content=body, media_type="application/json")
+        return payload
     
-    @app.post("/verified-person-alert", response_model=Dict[str, Any])
-    async def verified_person_alert(
-        camera_id: str = Form(...),
-        person_name: str = Form(...),
-        bbox: str = Form(...),  # JSON string: [x1, y1, x2, y2]
-        confidence: float = Form(...),
-        frame: UploadFile = File(...),
-        date: Optional[str] = Form(None),  # Optional: YYYY-MM-DD format
-        time_str: Optional[str] = Form(None),  # Optional: HH:MM:SS format
-        metadata: Optional[str] = Form(None)  # JSON string
-    ):
+    def _list_detections_sync(limit: int, event_type: Optional[str]) -> List[Dict[str, Any]]:
         """
-        Send alert for verified person detection with captured image and person information
+        List the most recent saved frames as detections
         
-        This endpoint accepts an image of a verified person (95%+ confidence) and sends an alert to n8n
-        with person information including name, date, and time.
-        Can be called directly from external systems or used as a webhook target.
+        Blocking file I/O - call through asyncio.to_thread from async routes.
+        
+        Args:
+            limit: Maximum number of frames to consider (newest first)
+            event_type: Only return this type ("verified_person"/"unknown_person"), or None for all
+            
+        Returns:
+            List of detection dictionaries
         """
-        try:
-            from datetime import datetime
+        index = frame_storage.index if frame_storage else FrameIndex(FRAMES_DIR)
+        
+        # Type and person name were parsed from the filename when it was indexed
+        detections = []
+        for filename, mtime, detection_type, person_name in index.recent(limit):
+            if event_type is None or detection_type == event_type:
+                frame_url = None
+                if frame_storage and frame_storage.base_url:
+                    frame_url = f"{frame_storage.base_url}/{filename}"
+                
+                detections.append({
+                    "type": detection_type,
+                    "person_name": person_name,
+                    "frame_filename": filename,
+                    "frame_url": frame_url,
+                    "timestamp": datetime.fromtimestamp(mtime).isoformat()
+                })
+        
+        return detections
+    
+    async def _handle_alert(kind: str, form: "AlertForm", frame: UploadFile) -> Dict[str, Any]:
+        """
+        Save the alert frame, build the detection event and send it to n8n
+        
+        Args:
+            kind: Key into ALERT_TYPES ("verified" or "unknown")
+            form: Validated form fields (VerifiedAlertForm adds the person fields)
+            frame: Uploaded image
             
-            # Validate confidence threshold (must be >= 0.95)
-            if confidence < 0.95:
+        Returns:
+            Response dictionary for the endpoint
+        """
+        spec = ALERT_TYPES[kind]
+        label = spec["label"].replace("_", " ")
+        person_name = getattr(form, "person_name", None)
+        
+        try:
+            # Validate confidence threshold before touching the upload; a rejected
+            # frame is never copied, and its spooled temp file is released right away
+            min_conf = spec["require_conf"]
+            if min_conf is not None and form.confidence < min_conf:
+                await frame.close()
                 raise HTTPException(
                     status_code=400, 
-                    detail=f"Confidence {confidence} is below required threshold of 0.95"
+                    detail=f"Confidence {form.confidence} is below required threshold of {min_conf}"
                 )
             
-            # Parse bbox
-            try:
-                bbox_list = json.loads(bbox)
-                if not isinstance(bbox_list, list) or len(bbox_list) != 4:
-                    raise ValueError("bbox must be a list of 4 numbers")
-            except (json.JSONDecodeError, ValueError) as e:
-                raise HTTPException(status_code=400, detail=f"Invalid bbox format: {e}")
-            
-            # Parse metadata if provided
-            metadata_dict = {}
-            if metadata:
-                try:
-                    metadata_dict = json.loads(metadata)
-                except json.JSONDecodeError:
-                    pass
-            
-            # Get date and time
+            # One clock read for the filename and the event timestamp
             now = datetime.now()
-            date_str = date if date else now.strftime("%Y-%m-%d")
-            time_str_val = time_str if time_str else now.strftime("%H:%M:%S")
-            datetime_str = f"{date_str} {time_str_val}"
             timestamp_str = now.isoformat()
             
-            # Read and save frame
-            frame_data = await frame.read()
+            # Stream the upload to disk (never held in memory as one bytes object)
             frame_url = None
             
             if frame_storage:
-                # Generate filename with person name and timestamp
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-                safe_name = person_name.replace(" ", "_").replace("/", "_")
-                filename = f"verified_{safe_name}_{timestamp}.jpg"
-                _, frame_url = frame_storage.save_frame(frame_data, filename=filename)
+                # Generate filename with person name (if any) and timestamp
+                timestamp = now.strftime("%Y%m%d_%H%M%S_%f")
+                name_part = f"{_SAFE_RE.sub('_', person_name)}_" if person_name is not None else ""
+                filename = f"{spec['filename_prefix']}{name_part}{timestamp}.jpg"
+                _, frame_url = await asyncio.to_thread(
+                    frame_storage.save_frame_stream, frame.file, filename, (spec["label"], person_name)
+                )
+            
+            metadata = {
+                **form.metadata,
+                "alert_source": "api_endpoint",
+                "alert_type": spec["label"],
+                **spec["metadata"]
+            }
+            response = {
+                "status": "success",
+                "message": spec["message"],
+                "event_type": spec["event_type"]
+            }
+            
+            if person_name is not None:
+                # Get date and time
+                date_str = form.date if form.date else now.strftime("%Y-%m-%d")
+                time_str_val = form.time_str if form.time_str else now.strftime("%H:%M:%S")
+                
+                # Person information
+                metadata["person"] = {
+                    "name": person_name,
+                    "confidence": float(form.confidence),
+                    "date": date_str,
+                    "time": time_str_val,
+                    "datetime": f"{date_str} {time_str_val}",
+                    "timestamp": timestamp_str
+                }
+                response.update({
+                    "person_name": person_name,
+                    "confidence": form.confidence,
+                    "date": date_str,
+                    "time": time_str_val
+                })
             
             # Create detection event
             detection_event = {
-                "camera_id": camera_id,
-                "event_type": "verified_person_detected",
+                "camera_id": form.camera_id,
+                "event_type": spec["event_type"],
                 "timestamp": timestamp_str,
                 "detections": [
                     {
-                        "label": "verified_person",
-                        "confidence": float(confidence),
-                        "bbox": [float(x) for x in bbox_list],
+                        "label": spec["label"],
+                        "confidence": float(form.confidence),
+                        "bbox": list(form.bbox),
                         "name": person_name
                     }
                 ],
                 "frame_url": frame_url,
                 "frame_base64": None,
                 "clip_url": None,
-                "metadata": {
-                    **metadata_dict,
-                    "alert_source": "api_endpoint",
-                    "alert_type": "verified_person",
-                    "confidence_threshold": 0.95,
-                    # Person information
-                    "person": {
-                        "name": person_name,
-                        "confidence": float(confidence),
-                        "date": date_str,
-                        "time": time_str_val,
-                        "datetime": datetime_str,
-                        "timestamp": timestamp_str
-                    }
-                }
+                "metadata": metadata
             }
             
             # Send to n8n webhook
             if webhook_client:
                 webhook_client.send_event(detection_event, async_send=True)
             
-            return {
-                "status": "success",
-                "message": "Verified person alert sent",
-                "event_type": "verified_person_detected",
-                "person_name": person_name,
-                "confidence": confidence,
-                "date": date_str,
-                "time": time_str_val,
-                "frame_url": frame_url,
-                "timestamp": timestamp_str
-            }
+            response["frame_url"] = frame_url
+            response["timestamp"] = timestamp_str
+            return response
         
         except HTTPException:
             raise
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error processing verified person alert: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error processing {label} alert: {str(e)}")
+    
+    @app.post("/verified-person-alert", response_model=Dict[str, Any])
+    async def verified_person_alert(
+        form: VerifiedAlertForm = Depends(VerifiedAlertForm.as_form),
+        frame: UploadFile = File(...)
+    ):
+        """
+        Send alert for verified person detection with captured image and person information
+        
+        This endpoint accepts an image of a verified person (95%+ confidence) and sends an alert to n8n
+        with person information including name, date, and time.
+        Can be called directly from external systems or used as a webhook target.
+        """
+        return await _handle_alert("verified", form, frame)
     
     @app.post("/unknown-person-alert", response_model=Dict[str, Any])
     async def unknown_person_alert(
-        camera_id: str = Form(...),
-        bbox: str = Form(...),  # JSON string: [x1, y1, x2, y2]
-        confidence: float = Form(...),
-        frame: UploadFile = File(...),
-        metadata: Optional[str] = Form(None)  # JSON string
+        form: AlertForm = Depends(AlertForm.as_form),
+        frame: UploadFile = File(...)
     ):
         """
         Send alert for unknown person detection with captured image
@@ -534,77 +1122,16 @@ if FASTAPI_AVAILABLE:
         This endpoint accepts an image of an unknown person and sends an alert to n8n.
         Can be called directly from external systems or used as a webhook target.
         """
-        try:
-            # Parse bbox
-            try:
-                bbox_list = json.loads(bbox)
-                if not isinstance(bbox_list, list) or len(bbox_list) != 4:
-                    raise ValueError("bbox must be a list of 4 numbers")
-            except (json.JSONDecodeError, ValueError) as e:
-                raise HTTPException(status_code=400, detail=f"Invalid bbox format: {e}")
-            
-            # Parse metadata if provided
-            metadata_dict = {}
-            if metadata:
-                try:
-                    metadata_dict = json.loads(metadata)
-                except json.JSONDecodeError:
-                    pass
-            
-            # Read and save frame
-            frame_data = await frame.read()
-            frame_url = None
-            
-            if frame_storage:
-                # Generate filename with timestamp
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-                filename = f"unknown_person_{timestamp}.jpg"
-                _, frame_url = frame_storage.save_frame(frame_data, filename=filename)
-            
-            # Create detection event
-            detection_event = {
-                "camera_id": camera_id,
-                "event_type": "unknown_person_detected",
-                "timestamp": datetime.now().isoformat(),
-                "detections": [
-                    {
-                        "label": "unknown_person",
-                        "confidence": float(confidence),
-                        "bbox": [float(x) for x in bbox_list],
-                        "name": None
-                    }
-                ],
-                "frame_url": frame_url,
-                "frame_base64": None,
-                "clip_url": None,
-                "metadata": {
-                    **metadata_dict,
-                    "alert_source": "api_endpoint",
-                    "alert_type": "unknown_person",
-                    "message": "Alien Detected"
-                }
-            }
-            
-            # Send to n8n webhook
-            if webhook_client:
-                webhook_client.send_event(detection_event, async_send=True)
-            
-            return {
-                "status": "success",
-                "message": "Unknown person alert sent",
-                "event_type": "unknown_person_detected",
-                "frame_url": frame_url,
-                "timestamp": detection_event["timestamp"]
-            }
-        
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error processing unknown person alert: {str(e)}")
+        return await _handle_alert("unknown", form, frame)
     
     
     @app.get("/")
-    async def root():
+    async def root(request: Request):
         """Root endpoint with API information"""
-        return {
+        return _cacheable_response(request, _ROOT_BODY)
+    
+    # Static, so serialized once at import
+    _ROOT_BODY = _json_bytes({
             "name": "Raspberry Pi Face Detection API",
             "version": "1.0.0",
             "description": "RESTful API - All read operations use GET, write operations use POST",
@@ -613,6 +1140,7 @@ if FASTAPI_AVAILABLE:
                 "GET /health": "Health check",
                 "GET /status": "System status",
                 "GET /detections": "Recent detections (?limit=10&event_type=verified_person)",
+                "GET /frames/{filename}": "Saved frame image (frame_url)",
                 "GET /enrolled-faces": "List enrolled faces",
                 "GET /statistics": "Detection statistics",
                 "GET /config": "Current configuration",
@@ -623,7 +1151,7 @@ if FASTAPI_AVAILABLE:
                 "example_get": "GET /detections?limit=10&event_type=verified_person",
                 "example_post": "POST /unknown-person-alert with form-data (camera_id, bbox, confidence, frame)"
             }
-        }
+        })
 
 # ============================================================================
 # HELPER FUNCTIONS
@@ -636,7 +1164,9 @@ def create_detection_event(
     frame: Optional[Any] = None,
     frame_url: Optional[str] = None,
     clip_url: Optional[str] = None,
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = None,
+    attach_frame: bool = False,
+    frame_jpeg: Optional[Any] = None
 ) -> Dict[str, Any]:
     """
     Create a detection event dictionary
@@ -649,6 +1179,10 @@ def create_detection_event(
         frame_url: Optional frame URL
         clip_url: Optional clip URL
         metadata: Optional additional metadata
+        attach_frame: Also attach the JPEG bytes as "frame_bytes", which
+            N8NWebhookClient sends as a multipart file part (no base64)
+        frame_jpeg: Optional frame already encoded with encode_jpeg (used
+            instead of encoding `frame`)
         
     Returns:
         Event dictionary ready for n8n
@@ -665,23 +1199,21 @@ def create_detection_event(
     
     # Handle frame if provided
     final_frame_url = frame_url
-    frame_base64 = None
+    frame_bytes = None
     
-    if frame is not None and frame_storage:
+    if (frame is not None or frame_jpeg is not None) and (frame_storage or attach_frame):
         try:
-            # Convert numpy array to JPEG bytes
-            from PIL import Image
-            import numpy as np
+            jpeg = frame_jpeg
+            if jpeg is None and isinstance(frame, np.ndarray):
+                # Encode once; the same JPEG buffer is saved and/or attached
+                jpeg = encode_jpeg(frame, quality=85)
             
-            if isinstance(frame, np.ndarray):
-                pil_image = Image.fromarray(frame)
-                import io
-                buffer = io.BytesIO()
-                pil_image.save(buffer, format="JPEG", quality=85)
-                frame_bytes = buffer.getvalue()
-                
-                # Save frame and get URL
-                _, final_frame_url = frame_storage.save_frame(frame_bytes)
+            if jpeg is not None:
+                # Save frame and get URL (straight from the buffer, no bytes copy)
+                if frame_storage:
+                    _, final_frame_url = frame_storage.save_frame(jpeg)
+                if attach_frame:
+                    frame_bytes = bytes(jpeg)
         except Exception as e:
             print(f"⚠️  Error processing frame: {e}")
     
@@ -692,10 +1224,11 @@ def create_detection_event(
         "timestamp": datetime.now().isoformat(),
         "detections": detection_list,
         "frame_url": final_frame_url,
-        "frame_base64": frame_base64,
         "clip_url": clip_url,
         "metadata": metadata or {}
     }
+    if frame_bytes is not None:
+        event["frame_bytes"] = frame_bytes
     
     return event
 
@@ -704,7 +1237,8 @@ def initialize_api_server(
     storage_dir: str = "frames",
     base_url: Optional[str] = None,
     host: str = "0.0.0.0",
-    port: int = 8000
+    port: int = 8000,
+    batch_interval: float = 0.0
 ):
     """
     Initialize and start the FastAPI server
@@ -712,11 +1246,12 @@ def initialize_api_server(
     Args:
         webhook_url: n8n webhook URL
         storage_dir: Directory for storing frames
-        base_url: Base URL for accessing frames
+        base_url: Base URL for accessing frames (default: this server's /frames)
         host: Server host
         port: Server port
+        batch_interval: Webhook batching window in seconds (0 = one POST per event)
     """
-    global webhook_client, frame_storage
+    global webhook_client, frame_storage, _api_server, _api_server_thread
     
     if not FASTAPI_AVAILABLE:
         print("❌ FastAPI not available - API server cannot start")
@@ -724,29 +1259,64 @@ def initialize_api_server(
         return None
     
     # Initialize components
-    webhook_client = N8NWebhookClient(webhook_url=webhook_url)
+    if base_url is None:
+        url_host = socket.gethostname() if host in ("0.0.0.0", "::") else host
+        base_url = f"http://{url_host}:{port}/frames"
+    webhook_client = N8NWebhookClient(webhook_url=webhook_url, batch_interval=batch_interval)
     frame_storage = FrameStorageManager(storage_dir=storage_dir, base_url=base_url)
     
+    # Serve saved frames as static files (sendfile, off the request handlers)
+    if not any(getattr(route, "name", None) == "frames" for route in app.routes):
+        app.mount("/frames", StaticFiles(directory=str(frame_storage.storage_dir)), name="frames")
+    
     print(f"🚀 Starting API server on {host}:{port}")
     print(f"   Webhook URL: {webhook_url or 'Not configured'}")
     print(f"   Frame storage: {storage_dir}")
+    print(f"   Frame URLs: {base_url}")
+    
+    # uvloop/httptools (from uvicorn[standard]) when installed; no per-request access log on the Pi
+    server_config = uvicorn.Config(
+        app, host=host, port=port,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        log_level="info",
+        access_log=False
+    )
+    _api_server = uvicorn.Server(server_config)
     
-    # Start server in background thread
+    # Serve on this thread's own event loop; stop_api_server() ends it cleanly
     def run_server():
-        uvicorn.run(app, host=host, port=port, log_level="info")
+        asyncio.run(_api_server.serve())
     
-    server_thread = threading.Thread(target=run_server, daemon=True)
-    server_thread.start()
+    _api_server_thread = threading.Thread(target=run_server, name="api-server", daemon=True)
+    _api_server_thread.start()
     
     return webhook_client
 
+def stop_api_server(timeout: float = 5.0):
+    """
+    Stop the API server started by initialize_api_server and the webhook worker
+    
+    Args:
+        timeout: Seconds to wait for the server thread to finish
+    """
+    global _api_server, _api_server_thread
+    
+    if _api_server is not None:
+        _api_server.should_exit = True
+        if _api_server_thread is not None:
+            _api_server_thread.join(timeout=timeout)
+        _api_server = None
+        _api_server_thread = None
+    if webhook_client:
+        webhook_client.stop_worker()
+
 if __name__ == "__main__":
     # Example usage
     import argparse
     
     # Get default storage directory (project root/frames)
-    BASE_DIR = Path(__file__).parent.parent
-    default_storage = str(BASE_DIR / "frames")
+    default_storage = str(FRAMES_DIR)
     
     parser = argparse.ArgumentParser(description="Start API server for n8n integration")
     parser.add_argument("--webhook-url", type=str, help="n8n webhook URL")
@@ -754,6 +1324,8 @@ if __name__ == "__main__":
     parser.add_argument("--port", type=int, default=8000, help="Server port")
     parser.add_argument("--storage-dir", type=str, default=default_storage, help="Frame storage directory")
     parser.add_argument("--base-url", type=str, help="Base URL for frame access")
+    parser.add_argument("--batch-interval", type=float, default=0.0,
+                        help="Coalesce webhook events within this many seconds into one POST (default: off)")
     
     args = parser.parse_args()
     
@@ -762,7 +1334,8 @@ if __name__ == "__main__":
         storage_dir=args.storage_dir,
         base_url=args.base_url,
         host=args.host,
-        port=args.port
+        port=args.port,
+        batch_interval=args.batch_interval
     )
     
     # Keep main thread alive
@@ -771,4 +1344,5 @@ if __name__ == "__main__":
             time.sleep(1)
     except KeyboardInterrupt:
         print("\n🛑 Shutting down API server...")
+        stop_api_server()
 
@@ -10,6 +10,7 @@ from multiple frames automatically.
 Usage:
     python3 enroll_face.py --name "John Doe" --video "face_video.mp4"
     python3 enroll_face.py --name "Jane Smith" --video "video.mp4" --max-frames 20
+    python3 enroll_face.py --name "John Doe" --video "face_video.mp4" --backend arcface
 
 Author: AI Assistant
 Date: 2024
@@ -18,67 +19,275 @@ Date: 2024
 import numpy as np
 import json
 import argparse
+import os
+import queue
 import sys
+import threading
 from pathlib import Path
 
 # Try to import face_recognition library
 try:
     import face_recognition
+    import dlib  # Installed with face_recognition; used for batched encoding
+    import face_recognition_models  # Model files installed with face_recognition
     FACE_RECOGNITION_AVAILABLE = True
 except ImportError:
     FACE_RECOGNITION_AVAILABLE = False
     face_recognition = None
+    dlib = None
+    face_recognition_models = None
     print("❌ face_recognition library not available.")
     print("   Install with: python3 -m pip install --break-system-packages face_recognition")
+    print("   For faster HOG detection on the Pi 5, build dlib with NEON first:")
+    print('   python3 setup.py install --compiler-flags "-O3 -mfpu=neon -march=armv8-a+simd -ffast-math"')
     sys.exit(1)
 
-# Try to import imageio for video processing (lightweight)
+# Try to import Pillow (resizing and grayscale conversion)
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    Image = None
+    print("❌ Pillow library not available.")
+    print("   Install with: python3 -m pip install --break-system-packages Pillow")
+    sys.exit(1)
+
+# Try to import OpenCV (optional - NEON-accelerated resize; not required, PIL is used otherwise)
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+    cv2 = None
+
+# Try to import PyAV (optional - in-process ffmpeg decode, hardware accelerated when possible)
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+    av = None
+
+# Try to import imageio for video processing (lightweight; fallback when PyAV is missing)
 try:
     import imageio
     IMAGEIO_AVAILABLE = True
 except ImportError:
     IMAGEIO_AVAILABLE = False
     imageio = None
-    print("❌ imageio library not available.")
-    print("   Install with: python3 -m pip install --break-system-packages imageio imageio-ffmpeg")
-    sys.exit(1)
+    if not AV_AVAILABLE:
+        print("❌ imageio library not available.")
+        print("   Install with: python3 -m pip install --break-system-packages imageio imageio-ffmpeg")
+        print("   (or PyAV: python3 -m pip install --break-system-packages av)")
+        sys.exit(1)
+
+# Try to import onnxruntime (optional - only needed for --backend arcface)
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+    ort = None
+
+# Try to import numba (optional - JIT-compiles the grayscale and pruning loops, releasing the GIL)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    njit = None
 
 # Configuration
 # Get base directory (parent of src/)
 BASE_DIR = Path(__file__).parent.parent
-FACE_DATABASE_PATH = str(BASE_DIR / "known_faces.json")
+FACE_DATABASE_PATH = str(BASE_DIR / "known_faces.json")  # Name index; encodings live in the .npz next to it
 DEFAULT_MAX_FRAMES = 30  # Maximum number of frames to process
 FRAME_SKIP = 5  # Process every Nth frame (for efficiency)
 MIN_FACE_SIZE = 80  # Minimum face size in pixels
+DETECTION_MAX_DIMENSION = 640  # Frames are shrunk to this for detection; encodings use full resolution
+DETECTION_UPSAMPLE = 0  # HOG pyramid upsampling; 0 finds faces >= ~80px (1/8 of the 640px width)
+DETECTION_RETRY_UPSAMPLE = 1  # Upsampling for a second pass on frames where nothing was found (faces >= ~40px, like the old 800px path); 0 disables it
+PIPELINE_QUEUE_SIZE = 4  # Frames buffered between the reader and the face workers
+PIPELINE_WORKERS = max(1, (os.cpu_count() or 4) - 1)  # Face detection threads (dlib releases the GIL); one core left for decoding
+SEEK_MIN_SECONDS = 1.0  # Seek (PyAV) instead of decoding through when kept frames are this far apart
+VIDEO_HWACCEL = "drm"  # PyAV hardware decode device ("drm" = Pi 5 V4L2/DRM path); None for software only
+PRUNE_MIN_DISTANCE = 0.35  # Drop encodings closer than this to one already kept (dlib match threshold is 0.6)
+PRUNE_MAX_KEEP = 8  # Most distinct encodings kept per enrollment
 FACE_DETECTION_MODEL = "hog"  # "hog" (faster) or "cnn" (more accurate, slower)
+ARCFACE_MODEL_PATH = str(BASE_DIR / "models" / "mobilefacenet_int8.onnx")
+ARCFACE_DATABASE_PATH = str(BASE_DIR / "known_faces_arcface.json")
+FACE_CHIP_SIZE = 150  # Aligned chip size and padding used by face_recognition.face_encodings
+FACE_CHIP_PADDING = 0.25
+
+# ONNX embedding session, set by init_arcface() for --backend arcface
+_arcface_session = None
+
+# Per-thread dlib face detectors and landmark predictors (see _face_detector)
+_thread_state = threading.local()
+
+# dlib ResNet face encoder, loaded by encode_face_chips() on first use
+_face_encoder = None
+
+# End-of-stream marker passed between pipeline stages
+_END = object()
+
+
+# Numeric kernels. No parallel=True: frames are already spread over the
+# pipeline's worker threads, and nogil lets those run the kernels concurrently.
+if NUMBA_AVAILABLE:
+    @njit(nogil=True, cache=True)
+    def _rgb_to_gray(frame):
+        """(H, W, 3) uint8 RGB -> (H, W) uint8 luma, same integer weights as PIL convert("L")"""
+        height, width = frame.shape[0], frame.shape[1]
+        gray = np.empty((height, width), dtype=np.uint8)
+        for y in range(height):
+            for x in range(width):
+                gray[y, x] = (np.uint32(frame[y, x, 0]) * 19595 + np.uint32(frame[y, x, 1]) * 38470
+                              + np.uint32(frame[y, x, 2]) * 7471 + 0x8000) >> 16
+        return gray
+    
+    @njit(nogil=True, cache=True, fastmath=True)
+    def _update_min_dist(points, idx, min_dist):
+        """Lower min_dist in place to each point's Euclidean distance to points[idx]"""
+        for i in range(points.shape[0]):
+            acc = 0.0
+            for j in range(points.shape[1]):
+                d = points[i, j] - points[idx, j]
+                acc += d * d
+            min_dist[i] = min(min_dist[i], np.sqrt(acc))
+        return min_dist
+else:
+    def _rgb_to_gray(frame):
+        """(H, W, 3) uint8 RGB -> (H, W) uint8 luma"""
+        return np.array(Image.fromarray(frame).convert("L"))
+    
+    def _update_min_dist(points, idx, min_dist):
+        """Lower min_dist in place to each point's Euclidean distance to points[idx]"""
+        np.minimum(min_dist, np.linalg.norm(points - points[idx], axis=1), out=min_dist)
+        return min_dist
 
 
 def load_database():
-    """Load existing face database"""
+    """
+    Load existing face database
+    
+    Encodings are stored as one float16 matrix plus a name per row in
+    known_faces.npz. An older known_faces.json holding the encodings as float
+    lists is read instead when there is no .npz yet (converted on next save).
+    
+    Returns:
+        Dict of name -> (N, D) float16 array of encodings
+    """
     db_path = Path(FACE_DATABASE_PATH)
-    if db_path.exists():
-        try:
+    npz_path = db_path.with_suffix(".npz")
+    try:
+        if npz_path.exists():
+            with np.load(npz_path) as data:
+                encodings, names = data["encodings"], data["names"].tolist()
+            database = {}
+            for name in dict.fromkeys(names):
+                database[name] = encodings[[i for i, n in enumerate(names) if n == name]]
+            return database
+        
+        if db_path.exists():
             with open(db_path, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"⚠️  Error loading database: {e}")
-            return {}
+                data = json.load(f)
+            # Only the legacy format has encoding lists; the current index has counts
+            return {name: np.asarray(encodings, dtype=np.float16)
+                    for name, encodings in data.items() if isinstance(encodings, list)}
+    except Exception as e:
+        print(f"⚠️  Error loading database: {e}")
     return {}
 
 
 def save_database(data):
-    """Save face database to file"""
+    """
+    Save face database to file
+    
+    Writes the encodings to known_faces.npz (float16) and a small
+    human-readable {name: encoding count} index to known_faces.json.
+    
+    Args:
+        data: Dict of name -> (N, D) array of encodings
+    """
     db_path = Path(FACE_DATABASE_PATH)
+    npz_path = db_path.with_suffix(".npz")
     try:
-        with open(db_path, 'w') as f:
-            json.dump(data, f, indent=2)
-        print(f"✅ Database saved to {db_path}")
+        names = [name for name, encodings in data.items() for _ in range(len(encodings))]
+        arrays = [np.asarray(encodings, dtype=np.float16) for encodings in data.values() if len(encodings)]
+        encodings = np.concatenate(arrays) if arrays else np.empty((0, 128), dtype=np.float16)
+        # Write temp files and rename them into place, so an interrupted save
+        # never leaves a truncated database behind
+        tmp_path = npz_path.with_name(npz_path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, encodings=encodings, names=np.array(names, dtype=str))
+        os.replace(tmp_path, npz_path)
+        
+        tmp_path = db_path.with_name(db_path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({name: len(encodings) for name, encodings in data.items()}, f, separators=(',', ':'))
+        os.replace(tmp_path, db_path)
+        print(f"✅ Database saved to {npz_path}")
         return True
     except Exception as e:
         print(f"❌ Error saving database: {e}")
         return False
 
 
+def init_arcface():
+    """
+    Load the ONNX face embedding model and switch enrollment to its database
+    
+    Returns:
+        True if the model was loaded
+    """
+    global _arcface_session, FACE_DATABASE_PATH
+    
+    if not ONNXRUNTIME_AVAILABLE:
+        print("❌ onnxruntime library not available.")
+        print("   Install with: python3 -m pip install --break-system-packages onnxruntime")
+        return False
+    
+    if not Path(ARCFACE_MODEL_PATH).exists():
+        print(f"❌ ArcFace model not found: {ARCFACE_MODEL_PATH}")
+        return False
+    
+    try:
+        _arcface_session = ort.InferenceSession(ARCFACE_MODEL_PATH, providers=["CPUExecutionProvider"])
+    except Exception as e:
+        print(f"❌ Error loading ArcFace model: {e}")
+        return False
+    
+    FACE_DATABASE_PATH = ARCFACE_DATABASE_PATH
+    print(f"✅ ArcFace model loaded: {Path(ARCFACE_MODEL_PATH).name}")
+    return True
+
+
+def arcface_embeddings(frame, face_locations):
+    """
+    Embed faces with the ONNX model (same preprocessing as the detector)
+    
+    Args:
+        frame: Input frame (numpy array, RGB format)
+        face_locations: List of (top, right, bottom, left) face locations
+        
+    Returns:
+        List of embeddings, one per face location
+    """
+    inp = _arcface_session.get_inputs()[0]
+    height = inp.shape[2] if isinstance(inp.shape[2], int) else 112
+    width = inp.shape[3] if isinstance(inp.shape[3], int) else 112
+    
+    embeddings = []
+    for top, right, bottom, left in face_locations:
+        crop = Image.fromarray(frame[top:bottom, left:right]).resize((width, height), Image.Resampling.BILINEAR)
+        x = (np.asarray(crop, dtype=np.float32) - 127.5) / 128.0
+        x = np.ascontiguousarray(x.transpose(2, 0, 1)[None])  # HWC -> NCHW
+        embeddings.append(_arcface_session.run(None, {inp.name: x})[0].reshape(-1))
+    return embeddings
+
+
 def resize_frame_if_needed(frame, max_dimension=800):
     """
     Resize frame if too large (for efficiency on Raspberry Pi)
@@ -98,63 +307,431 @@ def resize_frame_if_needed(frame, max_dimension=800):
         new_width = int(width * scale)
         new_height = int(height * scale)
         
-        # Use PIL for resizing (more efficient than numpy)
-        from PIL import Image
+        # INTER_AREA is the cheap, alias-free downscale kernel (vectorized in OpenCV)
+        if CV2_AVAILABLE:
+            return cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
+        
+        # Use PIL for resizing (more efficient than numpy); BILINEAR is plenty for
+        # detector input, which ignores high-frequency detail
         pil_image = Image.fromarray(frame)
-        pil_image = pil_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        pil_image = pil_image.resize((new_width, new_height), Image.Resampling.BILINEAR)
         return np.array(pil_image)
     
     return frame
 
 
-def extract_face_encodings_from_frame(frame):
+def scale_face_locations(face_locations, from_shape, to_shape):
     """
-    Extract face encodings from a single frame
+    Map face locations found on a resized frame back onto the original frame
+    
+    Args:
+        face_locations: List of (top, right, bottom, left) on the resized frame
+        from_shape: Shape of the resized frame
+        to_shape: Shape of the original frame
+        
+    Returns:
+        List of (top, right, bottom, left) on the original frame
+    """
+    if from_shape[:2] == to_shape[:2]:
+        return face_locations
+    
+    sy = to_shape[0] / from_shape[0]
+    sx = to_shape[1] / from_shape[1]
+    max_y, max_x = to_shape[0], to_shape[1]
+    return [
+        (max(0, int(top * sy)), min(max_x, int(right * sx)),
+         min(max_y, int(bottom * sy)), max(0, int(left * sx)))
+        for top, right, bottom, left in face_locations
+    ]
+
+
+def _face_detector():
+    """
+    Get this thread's own dlib face detector, building it on first use
+    
+    dlib detectors scan into per-object state and release the GIL, so the
+    pipeline workers must not share one (face_recognition's module-level
+    detectors included). Calling dlib directly also skips face_locations'
+    wrapper and its default upsampling.
+    
+    Returns:
+        HOG frontal face detector, or the CNN (mmod) detector for "cnn"
+    """
+    detector = getattr(_thread_state, "detector", None)
+    if detector is None:
+        if FACE_DETECTION_MODEL == "hog":
+            detector = dlib.get_frontal_face_detector()
+        else:
+            detector = dlib.cnn_face_detection_model_v1(
+                face_recognition_models.cnn_face_detector_model_location()
+            )
+        _thread_state.detector = detector
+    return detector
+
+
+def _shape_predictor():
+    """
+    Get this thread's 5-point landmark predictor, loading it on first use
+    
+    This is the "small" model face_recognition.face_encodings aligns with,
+    loaded from face_recognition_models rather than face_recognition's
+    private module globals.
+    
+    Returns:
+        dlib shape predictor
+    """
+    predictor = getattr(_thread_state, "predictor", None)
+    if predictor is None:
+        predictor = dlib.shape_predictor(face_recognition_models.pose_predictor_five_point_model_location())
+        _thread_state.predictor = predictor
+    return predictor
+
+
+def _run_detector(detector, image, upsample):
+    """Run a dlib face detector and return plain rectangles (the CNN detector wraps them)"""
+    detections = detector(image, upsample)
+    if FACE_DETECTION_MODEL == "hog":
+        return list(detections)
+    return [detection.rect for detection in detections]
+
+
+def detect_faces(frame):
+    """
+    Detect faces on a copy shrunk to DETECTION_MAX_DIMENSION
+    
+    HOG cost grows with the pixel count, so detection runs on the small copy and
+    the locations are mapped back onto the full-resolution frame for encoding.
     
     Args:
         frame: Input frame (numpy array, RGB format)
         
     Returns:
-        List of face encodings (each encoding is a 128-dimensional vector)
+        List of (top, right, bottom, left) face locations on the full frame
     """
-    try:
-        # Resize frame for faster processing (if needed)
-        frame_resized = resize_frame_if_needed(frame, max_dimension=800)
+    # Small copy for detection only
+    frame_small = resize_frame_if_needed(frame, max_dimension=DETECTION_MAX_DIMENSION)
+    
+    # Detect face locations with this thread's dlib detector ("hog" model for
+    # speed on Raspberry Pi)
+    detector = _face_detector()
+    if FACE_DETECTION_MODEL == "hog":
+        # HOG ignores colour, so it gets a single luma channel (a third of the
+        # gradient work); the encoder still uses the RGB frame
+        image = _rgb_to_gray(np.ascontiguousarray(frame_small))
+    else:
+        image = frame_small
+    rects = _run_detector(detector, image, DETECTION_UPSAMPLE)
+    if not rects and DETECTION_RETRY_UPSAMPLE > DETECTION_UPSAMPLE:
+        # Nothing found: look again for smaller (more distant) faces, paying for
+        # the upsampled pyramid only on these frames
+        rects = _run_detector(detector, image, DETECTION_RETRY_UPSAMPLE)
+    
+    height, width = frame_small.shape[:2]
+    face_locations = [
+        (max(rect.top(), 0), min(rect.right(), width), min(rect.bottom(), height), max(rect.left(), 0))
+        for rect in rects
+    ]
+    
+    return scale_face_locations(face_locations, frame_small.shape, frame.shape)
+
+
+def extract_face_samples_from_frame(frame):
+    """
+    Detect faces in a frame and prepare them for encoding
+    
+    For the dlib backend each face becomes an aligned chip, so that chips from
+    many frames can be encoded together by encode_face_chips(); the full frame
+    does not need to be kept. The ArcFace backend embeds the faces directly.
+    
+    Args:
+        frame: Input frame (numpy array, RGB format)
         
-        # Detect face locations using face_recognition (lightweight)
-        # Using "hog" model for speed on Raspberry Pi
-        face_locations = face_recognition.face_locations(
-            frame_resized, 
-            model=FACE_DETECTION_MODEL
-        )
+    Returns:
+        List of face chips (dlib) or embeddings (ArcFace), one per face
+    """
+    try:
+        face_locations = detect_faces(frame)
         
         if len(face_locations) == 0:
             return []
         
-        # Extract encodings for all detected faces
-        face_encodings = face_recognition.face_encodings(
-            frame_resized, 
-            face_locations
-        )
+        if _arcface_session is not None:
+            return arcface_embeddings(frame, face_locations)
+        
+        # Same 5-point alignment as face_recognition.face_encodings
+        predictor = _shape_predictor()
+        return [
+            dlib.get_face_chip(frame, predictor(frame, dlib.rectangle(left, top, right, bottom)),
+                               size=FACE_CHIP_SIZE, padding=FACE_CHIP_PADDING)
+            for top, right, bottom, left in face_locations
+        ]
         
-        return face_encodings
+    except Exception as e:
+        print(f"⚠️  Error processing frame: {e}")
+        return []
+
+
+def encode_face_chips(chips):
+    """
+    Encode aligned face chips in one batched dlib call
+    
+    Args:
+        chips: List of chips from extract_face_samples_from_frame()
+        
+    Returns:
+        List of face encodings (each encoding is a 128-dimensional vector)
+    """
+    global _face_encoder
+    if len(chips) == 0:
+        return []
+    if _face_encoder is None:
+        _face_encoder = dlib.face_recognition_model_v1(face_recognition_models.face_recognition_model_location())
+    descriptors = _face_encoder.compute_face_descriptor(chips, 1)
+    return [np.array(descriptor) for descriptor in descriptors]
+
+
+def extract_face_encodings_from_frame(frame):
+    """
+    Extract face encodings from a single frame
+    
+    Args:
+        frame: Input frame (numpy array, RGB format)
         
+    Returns:
+        List of face encodings (each encoding is a 128-dimensional vector)
+    """
+    samples = extract_face_samples_from_frame(frame)
+    if _arcface_session is not None:
+        return samples
+    
+    try:
+        return encode_face_chips(samples)
     except Exception as e:
         print(f"⚠️  Error processing frame: {e}")
         return []
 
 
-def process_video(video_path, max_frames=DEFAULT_MAX_FRAMES, frame_skip=FRAME_SKIP):
+class PyAVReader:
+    """
+    imageio-style video reader on PyAV
+    
+    Frames are decoded in-process (no raw RGB pipe from an ffmpeg subprocess),
+    and only the frames that are kept get converted to RGB.
+    """
+    
+    def __init__(self, path):
+        """
+        Open a video, with hardware decode when VIDEO_HWACCEL is set and supported
+        
+        Args:
+            path: Video file path
+        """
+        self.container = None
+        if VIDEO_HWACCEL:
+            try:
+                from av.codec.hwaccel import HWAccel
+                self.container = av.open(path, hwaccel=HWAccel(device_type=VIDEO_HWACCEL,
+                                                               allow_software_fallback=True))
+            except Exception:
+                self.container = None  # Older PyAV or no hardware device - decode in software
+        if self.container is None:
+            self.container = av.open(path)
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"  # Frame + slice threaded software decode
+    
+    def get_meta_data(self):
+        """Video metadata in imageio's format ("fps", "duration")"""
+        duration = self.container.duration / av.time_base if self.container.duration else 0
+        return {"fps": float(self.stream.average_rate or 30), "duration": float(duration)}
+    
+    def iter_frames(self, frame_skip=1):
+        """
+        Decode frames, converting only every Nth one
+        
+        When kept frames are at least SEEK_MIN_SECONDS apart, each one is reached
+        by seeking to the keyframe before it instead of decoding the whole gap.
+        
+        Args:
+            frame_skip: Yield every Nth frame
+            
+        Yields:
+            RGB frames (numpy arrays)
+        """
+        step = frame_skip / self.get_meta_data()["fps"]
+        if frame_skip > 1 and step >= SEEK_MIN_SECONDS and self.stream.time_base:
+            yield from self._iter_seeking(step)
+            return
+        
+        for frame_idx, frame in enumerate(self.container.decode(self.stream)):
+            if frame_idx % frame_skip == 0:
+                yield frame.to_ndarray(format="rgb24")
+    
+    def _iter_seeking(self, step):
+        """
+        Yield the first frame at or after every multiple of step seconds
+        
+        Args:
+            step: Seconds between kept frames
+            
+        Yields:
+            RGB frames (numpy arrays)
+        """
+        time_base = self.stream.time_base
+        start = self.stream.start_time or 0
+        target = 0.0
+        while True:
+            # Seek lands on the keyframe at or before the target; decode forward from there
+            self.container.seek(start + int(target / time_base), stream=self.stream, backward=True, any_frame=False)
+            target_pts = start + target / time_base
+            for frame in self.container.decode(self.stream):
+                if frame.pts is not None and frame.pts < target_pts:
+                    continue
+                yield frame.to_ndarray(format="rgb24")
+                break
+            else:
+                return  # Past the end of the stream
+            target += step
+    
+    def close(self):
+        """Close the container"""
+        self.container.close()
+
+
+def open_video(path):
+    """
+    Open a video with PyAV when available, else imageio
+    
+    Args:
+        path: Video file path
+        
+    Returns:
+        Reader with get_meta_data() and close()
+    """
+    if AV_AVAILABLE:
+        return PyAVReader(path)
+    return imageio.get_reader(path)
+
+
+def iter_video_frames(reader, frame_skip):
+    """
+    Yield every Nth frame of a reader from open_video
+    
+    Args:
+        reader: PyAVReader or imageio reader
+        frame_skip: Yield every Nth frame
+        
+    Yields:
+        Frames (numpy arrays)
+    """
+    if isinstance(reader, PyAVReader):
+        yield from reader.iter_frames(frame_skip)
+        return
+    if frame_skip == 1:
+        yield from reader
+        return
+    
+    # Strided random access; imageio's ffmpeg reader seeks instead of decoding long gaps
+    frame_idx = 0
+    while True:
+        try:
+            frame = reader.get_data(frame_idx)
+        except IndexError:
+            return
+        yield frame
+        frame_idx += frame_skip
+
+
+def _to_rgb(frame):
+    """
+    Convert a decoded frame to 3-channel RGB (imageio may return different formats)
+    
+    Args:
+        frame: Decoded frame (numpy array)
+        
+    Returns:
+        RGB frame
+    """
+    # One contiguous copy each, instead of fromarray -> convert -> array
+    if len(frame.shape) == 3:
+        if frame.shape[2] == 4:  # RGBA
+            frame = np.ascontiguousarray(frame[:, :, :3])
+        elif frame.shape[2] == 1:  # Grayscale
+            frame = np.repeat(frame, 3, axis=2)
+    return frame
+
+
+def _put(q, item, stop_event):
+    """
+    Put an item on a bounded queue, giving up once the pipeline is stopped
+    
+    Returns:
+        True if the item was queued
+    """
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _reader_stage(reader, frame_skip, frame_q, stop_event, errors, workers):
+    """Pipeline stage 1: decode, skip and convert frames, then queue them for the workers"""
+    try:
+        # Skip frames for efficiency
+        for frame in iter_video_frames(reader, frame_skip):
+            if stop_event.is_set():
+                break
+            
+            if not _put(frame_q, _to_rgb(frame), stop_event):
+                break
+    except Exception as e:
+        errors.append(e)
+    finally:
+        for _ in range(workers):
+            _put(frame_q, _END, stop_event)
+
+
+def _face_stage(frame_q, result_q, stop_event, errors):
+    """Pipeline stage 2: detect faces in queued frames and prepare them for encoding"""
+    try:
+        while not stop_event.is_set():
+            try:
+                frame = frame_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if frame is _END:
+                break
+            frame_samples = extract_face_samples_from_frame(frame)
+            del frame  # Don't hold a full frame while blocked on the result queue
+            if not _put(result_q, frame_samples, stop_event):
+                break
+    except Exception as e:
+        errors.append(e)
+    finally:
+        # The collector counts these, so every worker must post one
+        _put(result_q, _END, stop_event)
+
+
+def process_video(video_path, max_frames=DEFAULT_MAX_FRAMES, frame_skip=FRAME_SKIP, workers=PIPELINE_WORKERS):
     """
     Process video file and extract face encodings
     
+    Videos are decoded with PyAV (hardware accelerated when possible) or imageio.
+    Decoding runs on a reader thread and face detection on `workers` threads
+    (one frame each, in parallel across cores), connected by bounded queues, so ffmpeg decode overlaps with the
+    face work while memory stays flat. The collected face chips are then
+    encoded in a single batched call.
+    
     Args:
         video_path: Path to video file
         max_frames: Maximum number of frames to process
         frame_skip: Process every Nth frame
+        workers: Number of face detection threads
         
     Returns:
-        List of face encodings
+        (N, D) float16 array of face encodings (empty list on failure)
     """
     video_path = Path(video_path)
     
@@ -167,70 +744,95 @@ def process_video(video_path, max_frames=DEFAULT_MAX_FRAMES, frame_skip=FRAME_SK
     print(f"   Frame skip: {frame_skip} (processing every {frame_skip}th frame)")
     print()
     
-    encodings = []
+    samples = None  # (max_frames, ...) buffer of each frame's first face: chip (dlib) or embedding (ArcFace)
     frame_count = 0
     processed_count = 0
+    reader = None
     
     try:
         # Open video file
         print("   Opening video file...")
         video_path_str = str(video_path.absolute())
         print(f"   Video path: {video_path_str}")
-        reader = imageio.get_reader(video_path_str)
+        reader = open_video(video_path_str)
         
         # Get video info
         fps = reader.get_meta_data().get('fps', 30)
         duration = reader.get_meta_data().get('duration', 0)
-        total_frames = reader.count_frames() if hasattr(reader, 'count_frames') else 0
+        # Estimated from metadata (imageio's count_frames() decodes the whole video)
+        total_frames = int(round(fps * duration))
         
         print(f"   Video info: {fps:.1f} FPS, {duration:.1f}s duration")
         if total_frames > 0:
-            print(f"   Total frames: {total_frames}")
+            print(f"   Total frames: ~{total_frames}")
         print()
         
         print("🎬 Processing frames...")
         print("   (This may take a few minutes on Raspberry Pi)")
         print()
         
-        # Process frames
-        for frame_idx, frame in enumerate(reader):
-            # Skip frames for efficiency
-            if frame_idx % frame_skip != 0:
-                continue
-            
-            # Limit total frames processed
-            if processed_count >= max_frames:
-                break
-            
-            frame_count += 1
-            
-            # Convert to RGB if needed (imageio may return different formats)
-            if len(frame.shape) == 3:
-                if frame.shape[2] == 4:  # RGBA
-                    from PIL import Image
-                    pil_image = Image.fromarray(frame).convert('RGB')
-                    frame = np.array(pil_image)
-                elif frame.shape[2] == 1:  # Grayscale
-                    from PIL import Image
-                    pil_image = Image.fromarray(frame).convert('RGB')
-                    frame = np.array(pil_image)
-            
-            # Extract face encodings from this frame
-            frame_encodings = extract_face_encodings_from_frame(frame)
-            
-            if len(frame_encodings) > 0:
-                # Use the first (largest) face if multiple detected
-                encoding = frame_encodings[0]
-                encodings.append(encoding.tolist())
-                processed_count += 1
+        # reader -> frame_q -> face workers -> result_q -> this thread
+        frame_q = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        result_q = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        stop_event = threading.Event()
+        reader_errors = []
+        worker_errors = []
+        threads = [threading.Thread(target=_reader_stage, name="enroll-reader",
+                                    args=(reader, frame_skip, frame_q, stop_event, reader_errors, workers),
+                                    daemon=True)]
+        threads += [threading.Thread(target=_face_stage, name=f"enroll-face-{i}",
+                                     args=(frame_q, result_q, stop_event, worker_errors), daemon=True)
+                    for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        
+        # Collect results until every worker has finished or enough faces were found
+        finished_workers = 0
+        try:
+            while finished_workers < workers:
+                frame_samples = result_q.get()
+                if frame_samples is _END:
+                    if worker_errors:
+                        break  # A worker failed; stop the rest instead of finishing the video
+                    finished_workers += 1
+                    continue
                 
-                if processed_count % 5 == 0:
-                    print(f"   ✅ Processed {processed_count}/{max_frames} frames with faces...")
-            else:
-                if frame_count % 10 == 0:
-                    print(f"   ⏳ Processed {frame_count} frames, found {processed_count} faces...")
+                frame_count += 1
+                
+                if len(frame_samples) > 0:
+                    # Use the first (largest) face if multiple detected; copied into
+                    # the preallocated buffer so the per-frame result can be freed
+                    sample = frame_samples[0]
+                    if samples is None:
+                        samples = np.empty((max_frames,) + sample.shape, dtype=sample.dtype)
+                    samples[processed_count] = sample
+                    processed_count += 1
+                    
+                    if processed_count % 5 == 0:
+                        print(f"   ✅ Processed {processed_count}/{max_frames} frames with faces...")
+                    
+                    # Limit total frames processed
+                    if processed_count >= max_frames:
+                        break
+                else:
+                    if frame_count % 10 == 0:
+                        print(f"   ⏳ Processed {frame_count} frames, found {processed_count} faces...")
+        finally:
+            stop_event.set()
+            for thread in threads:
+                thread.join()
         
-        reader.close()
+        if reader_errors:
+            raise reader_errors[0]
+        if worker_errors:
+            raise worker_errors[0]
+        
+        # Encode every collected face in one batch (ArcFace samples are already embeddings)
+        samples = samples[:processed_count] if samples is not None else []
+        if _arcface_session is None and len(samples) > 0:
+            print(f"   🧠 Encoding {len(samples)} face(s)...")
+            samples = encode_face_chips(list(samples))
+        encodings = np.asarray(samples, dtype=np.float16)
         
         print()
         print(f"✅ Video processing complete!")
@@ -245,9 +847,51 @@ def process_video(video_path, max_frames=DEFAULT_MAX_FRAMES, frame_skip=FRAME_SK
         import traceback
         traceback.print_exc()
         return []
+    
+    finally:
+        if reader is not None:
+            reader.close()
+
+
+def prune_encodings(encodings, min_distance=PRUNE_MIN_DISTANCE, max_keep=PRUNE_MAX_KEEP):
+    """
+    Keep a small set of mutually distinct encodings (greedy farthest-point)
+    
+    Starting from the first encoding, repeatedly keep the one farthest from
+    everything kept so far, until it is within min_distance of the kept set or
+    max_keep are kept. Frames of a slowly rotating face are mostly near-duplicates,
+    and every stored encoding is compared against each face at recognition time.
+    
+    Args:
+        encodings: (N, D) array of encodings
+        min_distance: Minimum Euclidean distance to the kept set (ArcFace
+            embeddings are compared after L2 normalization)
+        max_keep: Maximum number of encodings to keep
+        
+    Returns:
+        (K, D) array of kept encodings, in their original order
+    """
+    if len(encodings) <= 1:
+        return encodings
+    
+    points = np.asarray(encodings, dtype=np.float32)
+    if _arcface_session is not None:
+        points = points / (np.linalg.norm(points, axis=1, keepdims=True) + 1e-6)
+    
+    kept = [0]
+    min_dist = _update_min_dist(points, 0, np.full(len(points), np.inf, dtype=np.float32))
+    while len(kept) < max_keep:
+        idx = int(np.argmax(min_dist))
+        if min_dist[idx] <= min_distance:
+            break
+        kept.append(idx)
+        _update_min_dist(points, idx, min_dist)
+    
+    return encodings[sorted(kept)]
 
 
-def enroll_face_from_video(name, video_path, max_frames=DEFAULT_MAX_FRAMES, frame_skip=FRAME_SKIP):
+def enroll_face_from_video(name, video_path, max_frames=DEFAULT_MAX_FRAMES, frame_skip=FRAME_SKIP, prune=True,
+                           workers=PIPELINE_WORKERS):
     """
     Enroll a new face from a video file
     
@@ -256,6 +900,8 @@ def enroll_face_from_video(name, video_path, max_frames=DEFAULT_MAX_FRAMES, fram
         video_path: Path to video file
         max_frames: Maximum number of frames to process
         frame_skip: Process every Nth frame
+        prune: Keep only distinct encodings (see prune_encodings)
+        workers: Number of face detection threads
     """
     print(f"\n👤 Enrolling face for: {name}")
     print("=" * 60)
@@ -264,7 +910,7 @@ def enroll_face_from_video(name, video_path, max_frames=DEFAULT_MAX_FRAMES, fram
     database = load_database()
     
     # Process video
-    encodings = process_video(video_path, max_frames=max_frames, frame_skip=frame_skip)
+    encodings = process_video(video_path, max_frames=max_frames, frame_skip=frame_skip, workers=workers)
     
     if len(encodings) == 0:
         print("\n❌ No face encodings extracted from video")
@@ -274,11 +920,16 @@ def enroll_face_from_video(name, video_path, max_frames=DEFAULT_MAX_FRAMES, fram
         print("   - Video format is supported (MP4, AVI, MOV, etc.)")
         return False
     
-    # Add to database
-    if name not in database:
-        database[name] = []
+    if prune:
+        extracted = len(encodings)
+        encodings = prune_encodings(encodings)
+        print(f"   Kept {len(encodings)} distinct encoding(s) of {extracted}")
     
-    database[name].extend(encodings)
+    # Add to database
+    if name in database:
+        database[name] = np.concatenate([database[name], encodings])
+    else:
+        database[name] = encodings
     
     # Save database
     if save_database(database):
@@ -357,11 +1008,20 @@ Video Requirements:
                        help=f"Maximum number of frames to process (default: {DEFAULT_MAX_FRAMES})")
     parser.add_argument("--frame-skip", type=int, default=FRAME_SKIP,
                        help=f"Process every Nth frame (default: {FRAME_SKIP}, lower = more thorough but slower)")
+    parser.add_argument("--workers", type=int, default=PIPELINE_WORKERS,
+                       help=f"Face detection threads (default: {PIPELINE_WORKERS}, CPU cores - 1)")
+    parser.add_argument("--no-prune", action="store_true",
+                       help="Store every extracted encoding instead of only distinct ones")
+    parser.add_argument("--backend", choices=["dlib", "arcface"], default="dlib",
+                       help="Encoding backend; must match RECOGNITION_BACKEND in the detector (default: dlib)")
     parser.add_argument("--list", action="store_true", help="List all enrolled faces")
     parser.add_argument("--delete", type=str, help="Delete a face from the database")
     
     args = parser.parse_args()
     
+    if args.backend == "arcface" and not init_arcface():
+        sys.exit(1)
+    
     if args.list:
         list_enrolled_faces()
     elif args.delete:
@@ -373,7 +1033,11 @@ Video Requirements:
         if args.frame_skip < 1:
             print("❌ frame-skip must be at least 1")
             sys.exit(1)
-        enroll_face_from_video(args.name, args.video, args.max_frames, args.frame_skip)
+        if args.workers < 1:
+            print("❌ workers must be at least 1")
+            sys.exit(1)
+        enroll_face_from_video(args.name, args.video, args.max_frames, args.frame_skip,
+                               prune=not args.no_prune, workers=args.workers)
     else:
         parser.print_help()
         print("\n❌ Error: --name and --video are required for enrollment")
@@ -19,14 +19,20 @@ import numpy as np
 import time
 import threading
 import queue
-from ultralytics import YOLO
+import collections
+import math
+import logging
 import argparse
 import sys
 import json
 import os
+import pickle
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
 
+# Detection lines go through logging so they cost one level check when disabled
+logger = logging.getLogger("rpi_face")
+
 # Try to import face_recognition library
 try:
     import face_recognition
@@ -38,6 +44,30 @@ except ImportError:
     print("   Facial recognition features will be disabled.")
     print("   Install with: python3 -m pip install --break-system-packages face_recognition")
 
+# Try to import onnxruntime (optional - ArcFace-style embedding backend for recognition)
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+    ort = None
+
+# Try to import OpenCV (optional - NEON-accelerated resize; not required, PIL is used otherwise)
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+    cv2 = None
+
+# Try to import numba (optional - JIT-compiles numeric post-processing, releasing the GIL)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    njit = None
+
 # Try to import ImageTk (requires both Pillow and tkinter)
 try:
     from PIL import ImageTk
@@ -66,12 +96,13 @@ if not DISPLAY_AVAILABLE:
 
 # Import picamera2 for Raspberry Pi Camera Module
 try:
-    from picamera2 import Picamera2
+    from picamera2 import Picamera2, MappedArray
     PICAMERA2_AVAILABLE = True
 except ImportError as e:
     # Try to provide more helpful error message
     PICAMERA2_AVAILABLE = False
     Picamera2 = None
+    MappedArray = None
     print(f"❌ picamera2 import failed: {e}")
     print("   picamera2 is required but could not be imported.")
     print("   If installed via apt: sudo apt install -y python3-picamera2")
@@ -93,32 +124,61 @@ class Config:
     MODEL_PATH = str(BASE_DIR / "models" / "yolov12n-face.pt")
     CONFIDENCE_THRESHOLD = 0.5
     IOU_THRESHOLD = 0.45
+    # "pt" (PyTorch), "ncnn" (ARM NEON kernels) or "openvino_int8" (INT8, latency mode). The
+    # exported formats are faster on the Pi 5 but are exported next to the .pt on first use,
+    # which takes a few minutes - opt in with this or --model-format
+    MODEL_FORMAT = "pt"
+    INT8_CALIBRATION_DATA = None  # Dataset YAML for INT8 calibration (None = Ultralytics default)
     
     # Camera settings
     CAMERA_WIDTH = 640
     CAMERA_HEIGHT = 480
     CAMERA_FPS = 30
+    ISP_DOWNSCALE = True  # Let the camera ISP produce the RESIZE_FACTOR-sized detector input (lores stream)
+    DETECT_ON_LORES_LUMA = False  # Use a YUV420 lores stream and detect on its Y plane (grayscale input)
     
     # Performance settings
     RESIZE_FACTOR = 0.75  # Resize input for faster processing
     SKIP_FRAMES = 2  # Process every 3rd frame for better performance
+    ADAPTIVE_SKIP_FRAMES = True  # Re-derive SKIP_FRAMES every second from measured processing time
+    PROC_TIME_EWMA_ALPHA = 0.2  # Weight of the newest processing time in the adaptive-skip estimate
+    LATENCY_TARGET_MS = 0  # Don't queue a frame for detection if its result would take longer than this (0 = off)
     ENABLE_PARALLEL_PROCESSING = True
-    MAX_QUEUE_SIZE = 3
+    MAX_QUEUE_SIZE = 1  # Inter-stage queue depth; stale items are dropped so each stage sees the freshest frame
+    DETECT_BATCH_SIZE = 1  # Frames per YOLO call in the detection stage (needs MAX_QUEUE_SIZE >= this to fill)
+    STATIC_SKIP_THRESHOLD = 2.0  # Reuse last results if mean pixel change is below this (0 = disabled)
     
     # Display settings
     SHOW_FPS = False  # Disabled - no text overlays
     SHOW_DETECTION_INFO = False  # Disabled - no text overlays
     SHOW_PERFORMANCE_STATS = False  # Disabled - no text overlays
-    PRINT_TO_CONSOLE = True  # Print detection info to console
+    LOG_LEVEL = "INFO"  # Detection lines are logged at INFO; "WARNING" silences them
+    CONSOLE_LOG_INTERVAL = 0.5  # Minimum seconds between detection lines on the console
+    DISPLAY_POLL_MS = 10  # How often the Tk main loop picks up the newest frame
     
     # Face recognition settings
     FACE_DATABASE_PATH = str(BASE_DIR / "known_faces.json")
     RECOGNITION_TOLERANCE = 0.6  # Lower = more strict (0.4-0.6 recommended)
+    # RECOGNITION_DOWNSCALE = 2 (opt-in, --fast-recognition) encodes faces from a quarter of the
+    # pixels: much faster, but small or distant faces yield coarser chips whose distances can
+    # drift across RECOGNITION_TOLERANCE - check matches on your own faces before enabling it
+    RECOGNITION_DOWNSCALE = 1  # Encode faces on a frame decimated by this factor (1 = full resolution)
+    # Face alignment: "small" (5-point) is face_recognition's default, used before this setting
+    # existed and by enroll_face.py; "large" (68-point) is slower and differs from enrollment
+    RECOGNITION_LANDMARK_MODEL = "small"
+    TRACK_IOU_THRESHOLD = 0.5  # Reuse the previous name for a box overlapping a tracked face at least this much
+    TRACK_TTL = 5  # Re-encode a tracked face after this many recognition passes
     ENABLE_FACE_RECOGNITION = True  # Set to False to disable recognition
+    RECOGNITION_BACKEND = "dlib"  # "dlib" (face_recognition) or "arcface" (ONNX embedding model via onnxruntime)
+    ARCFACE_MODEL_PATH = str(BASE_DIR / "models" / "mobilefacenet_int8.onnx")  # e.g. INT8-quantized MobileFaceNet
+    ARCFACE_DATABASE_PATH = str(BASE_DIR / "known_faces_arcface.json")  # Enroll with: enroll_face.py --backend arcface
+    ARCFACE_SIMILARITY_THRESHOLD = 0.4  # Minimum cosine similarity for an ArcFace match
     
     # API/n8n integration settings
     ENABLE_N8N_INTEGRATION = False  # Set to True to enable n8n webhook integration (auto-enabled if alerts are enabled)
     N8N_WEBHOOK_URL = "https://huyto002.app.n8n.cloud/webhook/5314c1d4-5ffc-4d3d-8e07-c05b9e8140a5"  # n8n webhook URL
+    N8N_BATCH_INTERVAL = 0.0  # Seconds to coalesce n8n events into one {"events": [...]} POST (0 = off)
+    N8N_ATTACH_FRAMES = False  # Upload the event's JPEG to n8n as a multipart file part (else only frame_url)
     API_SERVER_ENABLED = False  # Set to True to start FastAPI server
     API_SERVER_HOST = "0.0.0.0"
     API_SERVER_PORT = 8000
@@ -143,6 +203,111 @@ class Config:
     FPS_COLOR = (255, 255, 0)  # Yellow
     WARNING_COLOR = (255, 0, 0)  # Red
 
+# ============================================================================
+# NUMERIC HELPERS
+# ============================================================================
+
+if NUMBA_AVAILABLE:
+    @njit(nogil=True, cache=True, fastmath=True)
+    def _scale_boxes(boxes, scale):
+        """Scale (N, 4) xyxy boxes in place back to the original frame size"""
+        for i in range(boxes.shape[0]):
+            for j in range(4):
+                boxes[i, j] *= scale
+        return boxes
+    
+    @njit(nogil=True, cache=True, fastmath=True)
+    def _clip_boxes(boxes, width, height):
+        """Clip (N, 4) xyxy boxes in place to the frame bounds"""
+        for i in range(boxes.shape[0]):
+            boxes[i, 0] = min(max(boxes[i, 0], 0.0), width)
+            boxes[i, 1] = min(max(boxes[i, 1], 0.0), height)
+            boxes[i, 2] = min(max(boxes[i, 2], 0.0), width)
+            boxes[i, 3] = min(max(boxes[i, 3], 0.0), height)
+        return boxes
+else:
+    def _scale_boxes(boxes, scale):
+        """Scale (N, 4) xyxy boxes in place back to the original frame size"""
+        boxes *= scale
+        return boxes
+    
+    def _clip_boxes(boxes, width, height):
+        """Clip (N, 4) xyxy boxes in place to the frame bounds"""
+        np.clip(boxes[:, 0::2], 0.0, width, out=boxes[:, 0::2])
+        np.clip(boxes[:, 1::2], 0.0, height, out=boxes[:, 1::2])
+        return boxes
+
+
+def _no_detections():
+    """Empty (boxes, scores) result in the detect_faces() array layout"""
+    return np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32)
+
+
+def _to_soa(boxes):
+    """(N, 4) xyxy boxes -> (4, N) int32 array whose rows x1, y1, x2, y2 are each contiguous"""
+    return np.ascontiguousarray(boxes[:, :4].T, dtype=np.int32)
+
+
+def _box_iou(a, b):
+    """Pairwise IoU of (4, N) and (4, M) SoA boxes (see _to_soa), as an (N, M) array"""
+    x1a, y1a, x2a, y2a = a
+    x1b, y1b, x2b, y2b = b
+    w = np.minimum(x2a[:, None], x2b) - np.maximum(x1a[:, None], x1b)
+    h = np.minimum(y2a[:, None], y2b) - np.maximum(y1a[:, None], y1b)
+    np.maximum(w, 0, out=w)
+    np.maximum(h, 0, out=h)
+    inter = w * h
+    union = ((x2a - x1a) * (y2a - y1a))[:, None] + (x2b - x1b) * (y2b - y1b) - inter
+    return inter / np.maximum(union, 1)
+
+
+def _fill_rect(frame, x1, y1, x2, y2, color):
+    """Fill frame[y1:y2, x1:x2] with color in place, clipped to the frame"""
+    h, w = frame.shape[:2]
+    x1, x2 = max(0, x1), min(w, x2)
+    y1, y2 = max(0, y1), min(h, y2)
+    if x1 < x2 and y1 < y2:
+        frame[y1:y2, x1:x2] = color
+
+
+def _blit_mask(frame, x, y, mask, color):
+    """Set pixels where mask is True to color, with mask's top-left at (x, y), clipped to the frame"""
+    h, w = frame.shape[:2]
+    mh, mw = mask.shape
+    x1, y1 = max(0, x), max(0, y)
+    x2, y2 = min(w, x + mw), min(h, y + mh)
+    if x1 < x2 and y1 < y2:
+        frame[y1:y2, x1:x2][mask[y1 - y:y2 - y, x1 - x:x2 - x]] = color
+
+
+def _blit_sprite(frame, x, y, sprite):
+    """Copy an (h, w, 3) sprite into frame with its top-left at (x, y), clipped to the frame"""
+    h, w = frame.shape[:2]
+    sh, sw = sprite.shape[:2]
+    x1, y1 = max(0, x), max(0, y)
+    x2, y2 = min(w, x + sw), min(h, y + sh)
+    if x1 < x2 and y1 < y2:
+        frame[y1:y2, x1:x2] = sprite[y1 - y:y2 - y, x1 - x:x2 - x]
+
+
+def _load_font(size):
+    """Load a TrueType font of the given size, falling back to PIL's default font"""
+    try:
+        return ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", size)
+    except:
+        try:
+            return ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", size)
+        except:
+            return ImageFont.load_default()
+
+
+def _text_mask(text, font):
+    """Render text into a tight boolean mask (True where the glyphs are)"""
+    bbox = font.getbbox(text)
+    mask = Image.new("L", (max(1, bbox[2] - bbox[0]), max(1, bbox[3] - bbox[1])), 0)
+    ImageDraw.Draw(mask).text((-bbox[0], -bbox[1]), text, fill=255, font=font)
+    return np.asarray(mask) > 127
+
 # ============================================================================
 # FACE DETECTION SYSTEM
 # ============================================================================
@@ -162,35 +327,77 @@ class RaspberryPiFaceDetector:
         self.config = config
         self.model = None
         self.picam2 = None
+        self._lores_size = None  # (width, height) of the lores detection stream, if configured
+        self._main_size = None  # (width, height) of the main stream as configured by picamera2
+        
+        # Capture buffer rings: frames are copied out of the camera's DMA buffers into
+        # preallocated arrays that are reused after _ring_size captures. Only the capture
+        # loop and the display use them; the ring advances on every capture, so frames
+        # handed to the detect/recognize stages get their own buffer (see _acquire_buffer).
+        self._ring_size = config.MAX_QUEUE_SIZE + 2  # displayed frames + current
+        self._rings = {}
+        self._ring_index = 0
+        
+        # Free-lists of per-item pipeline buffers, by stream name. A buffer is owned by
+        # one queued item until its stage is done with it and returns it here; buffers
+        # of items dropped from a full queue are simply garbage collected.
+        self._free_buffers = {"main": queue.SimpleQueue(), "lores": queue.SimpleQueue()}
         
         # Performance tracking
         self.fps_counter = 0
         self.fps_start_time = time.time()
         self.current_fps = 0
         self.frame_count = 0
-        self.processing_times = []
-        
-        # Parallel processing
-        self.frame_queue = queue.Queue(maxsize=config.MAX_QUEUE_SIZE)
-        self.result_queue = queue.Queue(maxsize=config.MAX_QUEUE_SIZE)
+        self._camera_paced = False  # Camera frame rate lowered to the processing rate (SKIP_FRAMES applied by the camera)
+        self.processing_times = collections.deque(maxlen=30)  # Last 30 processing times
+        self._pt_sum = 0.0  # Running sum of processing_times
+        self._pt_appends = 0  # Total times recorded, to resync _pt_sum once per window
+        self.current_proc_time = 0.0  # Mean of processing_times
+        self._proc_ewma = 0.0  # Exponentially weighted processing time, reacts faster than the mean
+        
+        # Parallel processing: capture -> detect -> recognize -> draw/display (main thread)
+        self.frame_queue = queue.Queue(maxsize=config.MAX_QUEUE_SIZE)  # capture -> detect
+        self.recognition_queue = queue.Queue(maxsize=config.MAX_QUEUE_SIZE)  # detect -> recognize
+        self.result_queue = queue.Queue(maxsize=config.MAX_QUEUE_SIZE)  # recognize -> main loop
         self.is_running = False
+        self._stop_event = threading.Event()  # Set once on shutdown; worker stages exit cooperatively
         self.processing_thread = None
+        self.recognition_thread = None
+        self._result_ready = threading.Event()  # Set by the recognition stage when a result is queued
         
         # Detection results cache
-        self.last_boxes = []
-        self.last_scores = []
+        self.last_boxes, self.last_scores = _no_detections()
         self.last_names = []  # For face recognition
         self.last_detection_time = 0
+        self.last_num_faces = 0  # Cached len(self.last_boxes), updated on each new result
+        self.last_scores_list = []  # last_scores as Python floats, for console output
+        self._prev_thumb = None  # Downsampled frame from the last processed frame
         
         # Face recognition database
         self.known_face_encodings = []
         self.known_face_names = []
+        self._known_mat = None  # (K, 128) float32 stacked known encodings (memory-mapped from the .npy cache)
+        self._known_sq = None  # (K,) squared norms of _known_mat rows
+        self._arcface = None  # onnxruntime session when RECOGNITION_BACKEND == "arcface"
+        self._arcface_input = None  # (input name, batch size or None if dynamic, (height, width))
+        
+        # Faces recognized on the previous pass, matched to new boxes by IoU
+        self._track_soa = np.empty((4, 0), dtype=np.int32)  # Tracked boxes, see _to_soa
+        self._track_names = []
+        self._track_ttl = np.empty(0, dtype=np.int32)  # Passes left before a track is re-encoded
         self.face_recognition_enabled = False
         
         # Display window (tkinter)
         self.root = None
         self.display_label = None
         self.display_enabled = False
+        self._font_box = _load_font(16)  # Detection label font, loaded once
+        self._font_hud = _load_font(14)  # Performance overlay font
+        self._label_sprites = {}  # (label, color) -> pre-rendered label image
+        self._hud_masks = []  # Rendered performance overlay lines, refreshed every few frames
+        self._paused_mask = _text_mask("PAUSED - Press Ctrl+C to quit", ImageFont.load_default())  # Rendered once
+        self.display_queue = queue.Queue(maxsize=config.MAX_QUEUE_SIZE)  # capture loop -> Tk main loop
+        self.capture_thread = None
         
         # API/n8n integration
         self.n8n_client = None
@@ -198,11 +405,30 @@ class RaspberryPiFaceDetector:
         self.create_detection_event = None
         
         # Unknown person alert tracking
-        self.last_unknown_alert_time = {}  # Track last alert time per unknown face (by bbox hash)
+        self.last_unknown_alert_time = {}  # Track last alert time per unknown face (by bbox)
         
         # Verified person alert tracking
         self.last_verified_alert_time = {}  # Track last alert time per verified person (by name)
         
+        # Background dispatch of n8n events/alerts (keeps network I/O off the capture loop)
+        # SimpleQueue (C, no task tracking); bounded by the qsize() check in _dispatch_event
+        self._event_queue = queue.SimpleQueue()
+        self._event_queue_max = 16
+        self._event_thread = threading.Thread(target=self._event_worker, daemon=True)
+        self._event_thread.start()
+        
+        # Console detection lines are formatted and logged by a background thread
+        logger.setLevel(config.LOG_LEVEL)
+        if not logger.handlers and not logging.getLogger().handlers:
+            # Used without main(): nothing configured, so INFO would fall to lastResort (WARNING+)
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        self._log_queue = queue.Queue(maxsize=4)
+        self._last_log_time = 0.0
+        self._log_thread = threading.Thread(target=self._log_worker, daemon=True)
+        self._log_thread.start()
+        
         print("🚀 Initializing Raspberry Pi 5 Face Detection & Recognition System (Picamera2 Only)...")
         self.initialize_model()
         self.initialize_camera()
@@ -213,6 +439,9 @@ class RaspberryPiFaceDetector:
     def initialize_model(self):
         """Initialize the YOLO face detection model"""
         try:
+            # Imported here so --help and argument errors don't pay for torch/ultralytics
+            from ultralytics import YOLO
+            
             # Get absolute path to model file
             model_path = Path(self.config.MODEL_PATH)
             if not model_path.is_absolute():
@@ -226,8 +455,12 @@ class RaspberryPiFaceDetector:
                     f"Please ensure yolov12n-face.pt is in the same directory as this script."
                 )
             
-            print(f"📦 Loading model: {model_path}")
-            self.model = YOLO(str(model_path))
+            if self.config.MODEL_FORMAT in self.EXPORT_FORMATS and model_path.suffix == ".pt":
+                self.model = self._load_exported_model(model_path, self.config.MODEL_FORMAT)
+            
+            if self.model is None:
+                print(f"📦 Loading model: {model_path}")
+                self.model = YOLO(str(model_path))
             print("✅ Model loaded successfully")
             
         except FileNotFoundError as e:
@@ -238,6 +471,48 @@ class RaspberryPiFaceDetector:
             print("   Make sure ultralytics is installed: python3 -m pip install --break-system-packages ultralytics")
             sys.exit(1)
     
+    # MODEL_FORMAT -> (directory suffix written by Ultralytics export, export kwargs)
+    EXPORT_FORMATS = {
+        "ncnn": ("_ncnn_model", {"format": "ncnn"}),
+        "openvino_int8": ("_int8_openvino_model", {"format": "openvino", "int8": True}),
+    }
+    
+    def _load_exported_model(self, model_path, model_format):
+        """
+        Load an exported copy of a .pt model, exporting it on first use
+        
+        Exported OpenVINO models are run by Ultralytics with the LATENCY
+        performance hint for single-frame inference.
+        
+        Args:
+            model_path: Path to the .pt model
+            model_format: Key of EXPORT_FORMATS
+            
+        Returns:
+            YOLO model backed by the exported format, or None to fall back to PyTorch
+        """
+        from ultralytics import YOLO
+        
+        suffix, export_args = self.EXPORT_FORMATS[model_format]
+        export_path = model_path.with_name(f"{model_path.stem}{suffix}")
+        try:
+            if not export_path.exists():
+                # Export at the size frames are fed to the detector (multiple of stride 32)
+                det_size = max(self.config.CAMERA_WIDTH, self.config.CAMERA_HEIGHT) * self.config.RESIZE_FACTOR
+                imgsz = int(math.ceil(det_size / 32) * 32)
+                export_args = dict(export_args, imgsz=imgsz)
+                if export_args.get("int8") and self.config.INT8_CALIBRATION_DATA:
+                    export_args["data"] = self.config.INT8_CALIBRATION_DATA
+                print(f"🔧 Exporting model to {model_format} (one-time, imgsz={imgsz})...")
+                print(f"   This can take several minutes; the export is saved to {export_path}")
+                YOLO(str(model_path)).export(**export_args)
+            
+            print(f"📦 Loading model: {export_path}")
+            return YOLO(str(export_path), task="detect")
+        except Exception as e:
+            print(f"⚠️  {model_format} model not available ({e}) - using PyTorch model")
+            return None
+    
     def initialize_camera(self):
         """Initialize picamera2 camera capture"""
         if not PICAMERA2_AVAILABLE:
@@ -252,10 +527,22 @@ class RaspberryPiFaceDetector:
             self.picam2 = Picamera2()
             
             # Configure camera
+            size = (self.config.CAMERA_WIDTH, self.config.CAMERA_HEIGHT)
+            lores = None
+            self._lores_size = None
+            if self.config.ISP_DOWNSCALE or self.config.DETECT_ON_LORES_LUMA:
+                # Detector input straight from the ISP (even dimensions required)
+                factor = self.config.RESIZE_FACTOR if self.config.ISP_DOWNSCALE else 1.0
+                self._lores_size = (int(size[0] * factor) // 2 * 2, int(size[1] * factor) // 2 * 2)
+                lores_format = "YUV420" if self.config.DETECT_ON_LORES_LUMA else "RGB888"
+                lores = {"size": self._lores_size, "format": lores_format}
             config = self.picam2.create_preview_configuration(
-                main={"size": (self.config.CAMERA_WIDTH, self.config.CAMERA_HEIGHT), "format": "RGB888"}
+                main={"size": size, "format": "RGB888"},
+                lores=lores,
+                controls={"FrameRate": self.config.CAMERA_FPS}
             )
             self.picam2.configure(config)
+            self._main_size = tuple(self.picam2.camera_configuration()["main"]["size"])
             self.picam2.start()
             
             # Give camera time to start
@@ -285,47 +572,140 @@ class RaspberryPiFaceDetector:
             print("ℹ️  Face recognition disabled in config")
             return
         
-        if not FACE_RECOGNITION_AVAILABLE:
+        db_path = Path(self.config.FACE_DATABASE_PATH)
+        enroll_cmd = "python3 enroll_face.py"
+        if self.config.RECOGNITION_BACKEND == "arcface" and self._init_arcface():
+            db_path = Path(self.config.ARCFACE_DATABASE_PATH)
+            enroll_cmd += " --backend arcface"
+        elif not FACE_RECOGNITION_AVAILABLE:
             print("⚠️  face_recognition library not available - recognition disabled")
             print("   Install with: python3 -m pip install --break-system-packages face_recognition")
             return
         
         try:
             # Load known faces database
-            db_path = Path(self.config.FACE_DATABASE_PATH)
             if db_path.exists():
                 print(f"📚 Loading face database from {db_path}...")
-                with open(db_path, 'r') as f:
-                    data = json.load(f)
-                
-                self.known_face_encodings = []
-                self.known_face_names = []
-                
-                for person_name, encodings in data.items():
-                    for encoding in encodings:
-                        # Convert list back to numpy array
-                        encoding_array = np.array(encoding)
-                        self.known_face_encodings.append(encoding_array)
-                        self.known_face_names.append(person_name)
+                self._known_mat, self.known_face_names = self._load_face_database(db_path)
+                self.known_face_encodings = self._known_mat
                 
                 if len(self.known_face_names) > 0:
-                    unique_names = set(self.known_face_names)
-                    print(f"✅ Loaded {len(self.known_face_names)} face encoding(s) for {len(unique_names)} person(s)")
-                    for name in unique_names:
-                        count = self.known_face_names.count(name)
+                    if self._arcface is not None:
+                        # ArcFace embeddings are compared by cosine similarity
+                        self._known_mat = self._known_mat / (np.linalg.norm(self._known_mat, axis=1, keepdims=True) + 1e-6)
+                    self._known_sq = np.einsum('ij,ij->i', self._known_mat, self._known_mat)
+                    counts = collections.Counter(self.known_face_names)
+                    print(f"✅ Loaded {len(self.known_face_names)} face encoding(s) for {len(counts)} person(s)")
+                    for name, count in counts.items():
                         print(f"   - {name}: {count} encoding(s)")
                     self.face_recognition_enabled = True
                 else:
                     print("⚠️  Face database is empty - recognition disabled")
             else:
                 print(f"ℹ️  Face database not found at {db_path}")
-                print("   Run enrollment script to add faces: python3 enroll_face.py")
+                print(f"   Run enrollment script to add faces: {enroll_cmd}")
                 print("   Recognition will be disabled until faces are enrolled")
         
         except Exception as e:
             print(f"⚠️  Error loading face database: {e}")
             print("   Recognition disabled")
     
+    def _load_face_database(self, db_path):
+        """
+        Load the known-face database as a stacked encoding matrix
+        
+        enroll_face.py writes the encodings as a float16 matrix plus row names to
+        a .npz next to the JSON name index; that is loaded directly. A legacy JSON
+        file holding the encodings as float lists is converted once into a
+        float32 .npy matrix plus a pickled name list next to it, which later runs
+        memory-map instead of parsing JSON. That cache is rebuilt whenever the
+        JSON file is newer.
+        
+        Args:
+            db_path: Path of the JSON database
+            
+        Returns:
+            tuple: ((K, D) float32 array, list of K names)
+            
+        Raises:
+            FileNotFoundError: If the JSON is the .npz index but the .npz is missing
+        """
+        npz_path = db_path.with_suffix(".npz")
+        if npz_path.exists():
+            with np.load(npz_path) as data:
+                return data["encodings"].astype(np.float32), data["names"].tolist()
+        
+        mat_path = db_path.with_suffix(".npy")
+        names_path = db_path.with_suffix(".names.pkl")
+        
+        try:
+            json_mtime = db_path.stat().st_mtime
+            if (mat_path.stat().st_mtime >= json_mtime and names_path.stat().st_mtime >= json_mtime):
+                mat = np.load(mat_path, mmap_mode='r')
+                with open(names_path, 'rb') as f:
+                    names = pickle.load(f)
+                if len(names) == len(mat):
+                    return mat, names
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+            pass  # Missing or unreadable cache - rebuild it below
+        
+        with open(db_path, 'r') as f:
+            data = json.load(f)
+        
+        # The current JSON is only a {name: count} index of the .npz - nothing to parse here
+        if any(isinstance(encodings, int) for encodings in data.values()):
+            raise FileNotFoundError(
+                f"face database {npz_path.name} missing ({db_path.name} only indexes it) - "
+                f"re-run enroll_face.py to rebuild it"
+            )
+        
+        names = [person_name for person_name, encodings in data.items() for _ in encodings]
+        encodings = [encoding for person_encodings in data.values() for encoding in person_encodings]
+        mat = np.array(encodings, dtype=np.float32) if encodings else np.empty((0, 128), dtype=np.float32)
+        
+        try:
+            np.save(mat_path, mat)
+            with open(names_path, 'wb') as f:
+                pickle.dump(names, f, protocol=pickle.HIGHEST_PROTOCOL)
+            print(f"💾 Cached face database as {mat_path.name}")
+        except OSError as e:
+            print(f"⚠️  Could not cache face database: {e}")
+        
+        return mat, names
+    
+    def _init_arcface(self):
+        """
+        Load the ONNX face embedding model used by the "arcface" backend
+        
+        Returns:
+            bool: True if the model is ready, False to fall back to face_recognition
+        """
+        if not ONNXRUNTIME_AVAILABLE:
+            print("⚠️  onnxruntime not available - falling back to face_recognition encodings")
+            print("   Install with: python3 -m pip install --break-system-packages onnxruntime")
+            return False
+        
+        model_path = Path(self.config.ARCFACE_MODEL_PATH)
+        if not model_path.exists():
+            print(f"⚠️  ArcFace model not found at {model_path} - falling back to face_recognition encodings")
+            return False
+        
+        try:
+            self._arcface = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+            inp = self._arcface.get_inputs()[0]
+            batch, _, height, width = inp.shape  # NCHW
+            self._arcface_input = (
+                inp.name,
+                batch if isinstance(batch, int) else None,
+                (height if isinstance(height, int) else 112, width if isinstance(width, int) else 112),
+            )
+            print(f"✅ ArcFace model loaded: {model_path.name}")
+            return True
+        except Exception as e:
+            print(f"⚠️  Could not load ArcFace model: {e}")
+            self._arcface = None
+            return False
+    
     def initialize_api_integration(self):
         """Initialize API and n8n integration"""
         # Auto-enable n8n integration if unknown/verified person alerts are enabled
@@ -351,7 +731,8 @@ class RaspberryPiFaceDetector:
             
             # Initialize n8n webhook client if enabled
             if self.config.ENABLE_N8N_INTEGRATION and self.config.N8N_WEBHOOK_URL:
-                self.n8n_client = N8NWebhookClient(webhook_url=self.config.N8N_WEBHOOK_URL)
+                self.n8n_client = N8NWebhookClient(webhook_url=self.config.N8N_WEBHOOK_URL,
+                                                   batch_interval=self.config.N8N_BATCH_INTERVAL)
                 print(f"✅ n8n webhook client initialized: {self.config.N8N_WEBHOOK_URL}")
             
             # Initialize frame storage
@@ -370,7 +751,8 @@ class RaspberryPiFaceDetector:
                     storage_dir=self.config.API_FRAME_STORAGE_DIR,
                     base_url=self.config.API_FRAME_BASE_URL,
                     host=self.config.API_SERVER_HOST,
-                    port=self.config.API_SERVER_PORT
+                    port=self.config.API_SERVER_PORT,
+                    batch_interval=self.config.N8N_BATCH_INTERVAL
                 )
                 print(f"✅ API server started on {self.config.API_SERVER_HOST}:{self.config.API_SERVER_PORT}")
             
@@ -383,7 +765,7 @@ class RaspberryPiFaceDetector:
         except Exception as e:
             print(f"⚠️  Error initializing API integration: {e}")
     
-    def send_detection_event(self, boxes, scores, names, frame=None):
+    def send_detection_event(self, boxes, scores, names, frame_jpeg=None):
         """
         Send detection event to n8n
         
@@ -391,7 +773,7 @@ class RaspberryPiFaceDetector:
             boxes: List of bounding boxes
             scores: List of confidence scores
             names: List of recognized names
-            frame: Optional frame numpy array
+            frame_jpeg: Optional JPEG of the annotated frame (see _encode_event_frame)
         """
         if not self.n8n_client or len(boxes) == 0 or not self.create_detection_event:
             return
@@ -413,7 +795,8 @@ class RaspberryPiFaceDetector:
                 camera_id=self.config.CAMERA_ID,
                 event_type="face_detected",
                 detections=detections,
-                frame=frame,
+                frame_jpeg=frame_jpeg,
+                attach_frame=self.config.N8N_ATTACH_FRAMES,
                 metadata={
                     "frame_count": self.frame_count,
                     "fps": self.current_fps
@@ -426,7 +809,7 @@ class RaspberryPiFaceDetector:
         except Exception as e:
             print(f"⚠️  Error sending detection event: {e}")
     
-    def send_unknown_person_alert(self, boxes, scores, frame):
+    def send_unknown_person_alert(self, boxes, scores, frame_jpeg):
         """
         Send alert for unknown person detection with captured image
         
@@ -434,9 +817,10 @@ class RaspberryPiFaceDetector:
         This function will auto-initialize n8n client if needed.
         
         Args:
-            boxes: List of bounding boxes for unknown faces
+            boxes: List of bounding boxes for unknown faces (already past their
+                cooldown, see _unknown_alert_indices)
             scores: List of confidence scores
-            frame: Frame numpy array with the unknown person
+            frame_jpeg: JPEG of the frame cropped to the unknown person(s)
         """
         if not self.config.ENABLE_UNKNOWN_PERSON_ALERTS:
             return
@@ -451,7 +835,8 @@ class RaspberryPiFaceDetector:
                 print("ℹ️  Auto-initializing n8n client for unknown person alert...")
                 try:
                     from api_server import N8NWebhookClient, FrameStorageManager, create_detection_event
-                    self.n8n_client = N8NWebhookClient(webhook_url=self.config.N8N_WEBHOOK_URL)
+                    self.n8n_client = N8NWebhookClient(webhook_url=self.config.N8N_WEBHOOK_URL,
+                                                   batch_interval=self.config.N8N_BATCH_INTERVAL)
                     
                     # Initialize frame storage if not already done
                     if not self.api_frame_storage and self.config.API_FRAME_STORAGE_DIR:
@@ -494,74 +879,23 @@ class RaspberryPiFaceDetector:
                 return
         
         try:
-            import hashlib
-            
-            # Filter for unknown faces only and check cooldown
-            unknown_detections = []
-            unknown_boxes = []
-            unknown_scores = []
-            current_time = time.time()
-            
-            for i, (box, score) in enumerate(zip(boxes, scores)):
-                # Check if this is an unknown face (name would be "Unknown" or None)
-                # We'll check this by seeing if recognition is enabled and face wasn't recognized
-                # For now, we'll send alert for all faces if recognition is disabled
-                # or if we detect unknown faces
-                
-                # Create a hash of the bbox for cooldown tracking
-                bbox_str = f"{box[0]:.1f},{box[1]:.1f},{box[2]:.1f},{box[3]:.1f}"
-                bbox_hash = hashlib.md5(bbox_str.encode()).hexdigest()
-                
-                # Check cooldown
-                if bbox_hash in self.last_unknown_alert_time:
-                    time_since_last = current_time - self.last_unknown_alert_time[bbox_hash]
-                    if time_since_last < self.config.UNKNOWN_PERSON_ALERT_COOLDOWN:
-                        continue  # Skip this detection (still in cooldown)
-                
-                # Add to unknown detections
-                unknown_boxes.append(box)
-                unknown_scores.append(score)
-                unknown_detections.append({
+            unknown_detections = [
+                {
                     "label": "unknown_person",
                     "confidence": float(score),
                     "bbox": [float(x) for x in box[:4]] if len(box) >= 4 else [0, 0, 0, 0],
                     "name": None
-                })
-                
-                # Update last alert time
-                self.last_unknown_alert_time[bbox_hash] = current_time
-            
-            # Only send alert if we have unknown detections
-            if len(unknown_detections) == 0:
-                return
-            
-            # Crop the frame to show the unknown person(s) more clearly
-            # Get bounding box that encompasses all unknown faces
-            if len(unknown_boxes) > 0:
-                min_x = min(box[0] for box in unknown_boxes)
-                min_y = min(box[1] for box in unknown_boxes)
-                max_x = max(box[2] for box in unknown_boxes)
-                max_y = max(box[3] for box in unknown_boxes)
-                
-                # Add padding
-                padding = 20
-                h, w = frame.shape[:2]
-                crop_x1 = max(0, int(min_x) - padding)
-                crop_y1 = max(0, int(min_y) - padding)
-                crop_x2 = min(w, int(max_x) + padding)
-                crop_y2 = min(h, int(max_y) + padding)
-                
-                # Crop frame
-                cropped_frame = frame[crop_y1:crop_y2, crop_x1:crop_x2]
-            else:
-                cropped_frame = frame
+                }
+                for box, score in zip(boxes, scores)
+            ]
             
             # Create alert event
             event = self.create_detection_event(
                 camera_id=self.config.CAMERA_ID,
                 event_type="unknown_person_detected",
                 detections=unknown_detections,
-                frame=cropped_frame,  # Send cropped frame focusing on unknown person
+                frame_jpeg=frame_jpeg,  # Cropped frame focusing on unknown person
+                attach_frame=self.config.N8N_ATTACH_FRAMES,
                 metadata={
                     "frame_count": self.frame_count,
                     "fps": self.current_fps,
@@ -580,15 +914,16 @@ class RaspberryPiFaceDetector:
         except Exception as e:
             print(f"⚠️  Error sending unknown person alert: {e}")
     
-    def send_verified_person_alert(self, boxes, scores, names, frame):
+    def send_verified_person_alert(self, boxes, scores, names, frame_jpeg):
         """
         Send alert for verified person detection with captured image and person information
         
         Args:
-            boxes: List of bounding boxes for verified faces
+            boxes: List of bounding boxes for verified faces (already past the
+                confidence threshold and their cooldown, see _verified_alert_indices)
             scores: List of confidence scores
             names: List of recognized names
-            frame: Frame numpy array with the verified person
+            frame_jpeg: JPEG of the frame cropped to the verified person(s)
         """
         if not self.config.ENABLE_VERIFIED_PERSON_ALERTS:
             return
@@ -602,66 +937,17 @@ class RaspberryPiFaceDetector:
         try:
             from datetime import datetime
             
-            # Filter for verified persons only (confidence >= threshold, name not "Unknown")
-            verified_detections = []
-            verified_boxes = []
-            verified_scores = []
-            verified_names = []
-            current_time = time.time()
-            
-            for i, (box, score, name) in enumerate(zip(boxes, scores, names)):
-                # Check if this is a verified person
-                if name is None or name == "Unknown":
-                    continue
-                
-                # Check confidence threshold
-                if float(score) < self.config.VERIFIED_PERSON_CONFIDENCE_THRESHOLD:
-                    continue
-                
-                # Check cooldown per person (by name)
-                if name in self.last_verified_alert_time:
-                    time_since_last = current_time - self.last_verified_alert_time[name]
-                    if time_since_last < self.config.VERIFIED_PERSON_ALERT_COOLDOWN:
-                        continue  # Skip this detection (still in cooldown)
-                
-                # Add to verified detections
-                verified_boxes.append(box)
-                verified_scores.append(score)
-                verified_names.append(name)
-                verified_detections.append({
+            verified_scores = [float(score) for score in scores]
+            verified_names = list(names)
+            verified_detections = [
+                {
                     "label": "verified_person",
-                    "confidence": float(score),
+                    "confidence": score,
                     "bbox": [float(x) for x in box[:4]] if len(box) >= 4 else [0, 0, 0, 0],
                     "name": name
-                })
-                
-                # Update last alert time
-                self.last_verified_alert_time[name] = current_time
-            
-            # Only send alert if we have verified detections
-            if len(verified_detections) == 0:
-                return
-            
-            # Crop the frame to show the verified person(s) more clearly
-            # Get bounding box that encompasses all verified faces
-            if len(verified_boxes) > 0:
-                min_x = min(box[0] for box in verified_boxes)
-                min_y = min(box[1] for box in verified_boxes)
-                max_x = max(box[2] for box in verified_boxes)
-                max_y = max(box[3] for box in verified_boxes)
-                
-                # Add padding
-                padding = 20
-                h, w = frame.shape[:2]
-                crop_x1 = max(0, int(min_x) - padding)
-                crop_y1 = max(0, int(min_y) - padding)
-                crop_x2 = min(w, int(max_x) + padding)
-                crop_y2 = min(h, int(max_y) + padding)
-                
-                # Crop frame
-                cropped_frame = frame[crop_y1:crop_y2, crop_x1:crop_x2]
-            else:
-                cropped_frame = frame
+                }
+                for box, score, name in zip(boxes, verified_scores, verified_names)
+            ]
             
             # Get current date and time
             now = datetime.now()
@@ -674,7 +960,8 @@ class RaspberryPiFaceDetector:
                 camera_id=self.config.CAMERA_ID,
                 event_type="verified_person_detected",
                 detections=verified_detections,
-                frame=cropped_frame,  # Send cropped frame focusing on verified person
+                frame_jpeg=frame_jpeg,  # Cropped frame focusing on verified person
+                attach_frame=self.config.N8N_ATTACH_FRAMES,
                 metadata={
                     "frame_count": self.frame_count,
                     "fps": self.current_fps,
@@ -735,10 +1022,10 @@ class RaspberryPiFaceDetector:
     
     def update_display(self, frame):
         """
-        Update the display window with a new frame
+        Update the display window with a new frame (Tk main thread only)
         
         Args:
-            frame: PIL Image or numpy array (RGB format)
+            frame: numpy array (RGB format)
         """
         if not self.display_enabled or self.root is None or self.display_label is None:
             return
@@ -747,11 +1034,7 @@ class RaspberryPiFaceDetector:
             return
         
         try:
-            # Convert to PIL Image if needed
-            if isinstance(frame, np.ndarray):
-                pil_image = Image.fromarray(frame)
-            else:
-                pil_image = frame
+            pil_image = Image.fromarray(frame)
             
             # Resize if needed to fit window (optional - can be removed for full resolution)
             # For now, keep original size
@@ -766,55 +1049,52 @@ class RaspberryPiFaceDetector:
             # Update window size to match image
             self.root.geometry(f"{pil_image.width}x{pil_image.height}")
             
-            # Process tkinter events (non-blocking)
-            self.root.update_idletasks()
-            self.root.update()
-            
         except Exception as e:
             # Silently handle display errors to avoid breaking the main loop
             pass
     
+    def _poll_display(self):
+        """Show the newest frame from the capture loop and reschedule itself on the Tk event loop"""
+        if not self.is_running:
+            self.root.quit()
+            return
+        
+        try:
+            self.update_display(self.display_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        self.root.after(self.config.DISPLAY_POLL_MS, self._poll_display)
+    
     def on_closing(self):
         """Handle window closing event"""
         print("\n🛑 Window closed by user")
         self.is_running = False
+        self._stop_event.set()
         if self.root:
-            self.root.destroy()
+            # Leave mainloop; cleanup() destroys the window once the threads have stopped
+            self.root.quit()
     
-    def detect_faces(self, frame):
+    def detect_faces(self, frame, frame_shape=None):
         """
         Detect faces in a frame using YOLO
         
         Args:
-            frame: Input image frame (RGB format from picamera2)
+            frame: Input image frame (RGB format from picamera2, or a 2-D luma plane)
+            frame_shape: (height, width) of the frame boxes should refer to. If it
+                differs from frame's size, frame is taken as already downscaled
+                (e.g. by the ISP) and is not resized again.
             
         Returns:
-            tuple: (boxes, scores) - bounding boxes and confidence scores
+            tuple: (boxes, scores) - float32 arrays of shape (N, 4) xyxy and (N,)
         """
         if self.model is None:
-            return [], []
+            return _no_detections()
         
-        # Validate frame
-        if frame is None or (isinstance(frame, np.ndarray) and frame.size == 0):
-            return [], []
-        
-        try:
-            H, W = frame.shape[:2]
-        except (AttributeError, IndexError):
-            return [], []
-        
-        # Resize frame for faster processing
-        if self.config.RESIZE_FACTOR != 1.0:
-            new_w = int(W * self.config.RESIZE_FACTOR)
-            new_h = int(H * self.config.RESIZE_FACTOR)
-            # Use PIL for resizing (more efficient than numpy)
-            pil_image = Image.fromarray(frame)
-            pil_image = pil_image.resize((new_w, new_h), Image.Resampling.LANCZOS)
-            frame_resized = np.array(pil_image)
-            scale_factor = 1.0 / self.config.RESIZE_FACTOR
-        else:
-            frame_resized = frame
-            scale_factor = 1.0
+        prepared = self._prepare_detector_input(frame, frame_shape)
+        if prepared is None:
+            return _no_detections()
+        frame_resized, scale_factor, W, H = prepared
         
         try:
             # Run YOLO detection
@@ -822,42 +1102,117 @@ class RaspberryPiFaceDetector:
                 frame_resized, 
                 conf=self.config.CONFIDENCE_THRESHOLD,
                 iou=self.config.IOU_THRESHOLD,
+                classes=[0],  # Face class only; filtered inside Ultralytics' NMS
                 verbose=False
             )
             
-            boxes = []
-            scores = []
-            
-            if len(results) > 0 and results[0].boxes is not None:
-                yolo_boxes = results[0].boxes
-                if len(yolo_boxes) > 0:
-                    # Filter for face class (class 0 in face detection models)
-                    face_mask = yolo_boxes.cls == 0
-                    if face_mask.any():
-                        boxes = yolo_boxes.xyxy[face_mask].cpu().numpy()
-                        scores = yolo_boxes.conf[face_mask].cpu().numpy()
-                        
-                        # Scale boxes back to original frame size
-                        if scale_factor != 1.0:
-                            boxes *= scale_factor
-            
-            # Ensure we return lists, not numpy arrays
-            if isinstance(boxes, np.ndarray):
-                boxes = boxes.tolist()
-            if isinstance(scores, np.ndarray):
-                scores = scores.tolist()
-            
-            # Ensure boxes and scores are lists
-            if not isinstance(boxes, list):
-                boxes = list(boxes) if boxes else []
-            if not isinstance(scores, list):
-                scores = list(scores) if scores else []
+            if len(results) == 0:
+                return _no_detections()
+            return self._extract_faces(results[0], scale_factor, W, H)
             
-            return boxes, scores
+        except Exception as e:
+            print(f"⚠️ Error in face detection: {e}")
+            return _no_detections()
+    
+    def detect_faces_batch(self, frames, frame_shapes):
+        """
+        Detect faces in several frames with a single YOLO call
+        
+        Args:
+            frames: List of input frames (as for detect_faces)
+            frame_shapes: List of (height, width) each frame's boxes should refer to
             
+        Returns:
+            list: One (boxes, scores) tuple per frame
+        """
+        if self.model is None:
+            return [_no_detections() for _ in frames]
+        
+        prepared = [self._prepare_detector_input(f, shape) for f, shape in zip(frames, frame_shapes)]
+        valid = [i for i, p in enumerate(prepared) if p is not None]
+        detections = [_no_detections() for _ in frames]
+        if not valid:
+            return detections
+        
+        try:
+            results = self.model(
+                [prepared[i][0] for i in valid],
+                conf=self.config.CONFIDENCE_THRESHOLD,
+                iou=self.config.IOU_THRESHOLD,
+                classes=[0],  # Face class only; filtered inside Ultralytics' NMS
+                verbose=False
+            )
+            for i, result in zip(valid, results):
+                _, scale_factor, W, H = prepared[i]
+                detections[i] = self._extract_faces(result, scale_factor, W, H)
         except Exception as e:
             print(f"⚠️ Error in face detection: {e}")
-            return [], []
+        
+        return detections
+    
+    def _prepare_detector_input(self, frame, frame_shape=None):
+        """
+        Resize a frame for the detector (see detect_faces for the arguments)
+        
+        Returns:
+            tuple: (detector_input, scale_factor, width, height) where width/height
+            are the size boxes should be mapped back to, or None for an invalid frame
+        """
+        # Validate frame
+        if frame is None or frame.size == 0:
+            return None
+        
+        try:
+            H, W = frame.shape[:2]
+        except (AttributeError, IndexError):
+            return None
+        
+        # Resize frame for faster processing (unless the ISP already did)
+        if frame_shape is not None and tuple(frame_shape[:2]) != (H, W):
+            frame_resized = frame
+            scale_factor = frame_shape[1] / W
+            H, W = frame_shape[:2]
+        elif self.config.RESIZE_FACTOR != 1.0:
+            new_w = int(W * self.config.RESIZE_FACTOR)
+            new_h = int(H * self.config.RESIZE_FACTOR)
+            if CV2_AVAILABLE:
+                frame_resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_AREA)
+            else:
+                # Bilinear is area-averaging when downscaling in PIL and far cheaper than
+                # LANCZOS's wider kernel; the detector does not need the extra sharpness
+                frame_resized = np.asarray(Image.fromarray(frame).resize((new_w, new_h), Image.Resampling.BILINEAR))
+            scale_factor = 1.0 / self.config.RESIZE_FACTOR
+        else:
+            frame_resized = frame
+            scale_factor = 1.0
+        
+        # YOLO expects 3 channels; replicate a luma plane after resizing
+        if frame_resized.ndim == 2:
+            frame_resized = np.stack([frame_resized] * 3, axis=-1)
+        
+        return frame_resized, scale_factor, W, H
+    
+    def _extract_faces(self, result, scale_factor, W, H):
+        """
+        Convert one YOLO result into (boxes, scores) in original frame coordinates
+        
+        Returns:
+            tuple: (boxes, scores) - float32 arrays of shape (N, 4) xyxy and (N,)
+        """
+        boxes, scores = _no_detections()
+        
+        # Only the face class (0) was requested, so no per-class mask is needed here
+        yolo_boxes = result.boxes
+        if yolo_boxes is not None and len(yolo_boxes) > 0:
+            boxes = np.ascontiguousarray(yolo_boxes.xyxy.cpu().numpy(), dtype=np.float32)
+            scores = np.ascontiguousarray(yolo_boxes.conf.cpu().numpy(), dtype=np.float32)
+            
+            # Scale boxes back to original frame size
+            if scale_factor != 1.0:
+                boxes = _scale_boxes(boxes, np.float32(scale_factor))
+            boxes = _clip_boxes(boxes, np.float32(W), np.float32(H))
+        
+        return boxes, scores
     
     def recognize_faces(self, frame, boxes):
         """
@@ -865,105 +1220,167 @@ class RaspberryPiFaceDetector:
         
         Args:
             frame: Input frame (numpy array, RGB format)
-            boxes: List of bounding boxes
+            boxes: (N, 4) array of bounding boxes
             
         Returns:
             list: List of recognized names (or "Unknown" for unrecognized faces)
         """
         if not self.face_recognition_enabled or len(self.known_face_encodings) == 0:
-            return ["Unknown"] * len(boxes) if boxes else []
+            return ["Unknown"] * len(boxes)
         
-        if not FACE_RECOGNITION_AVAILABLE or len(boxes) == 0:
-            return ["Unknown"] * len(boxes) if boxes else []
+        if (self._arcface is None and not FACE_RECOGNITION_AVAILABLE) or len(boxes) == 0:
+            return ["Unknown"] * len(boxes)
         
         try:
-            # Convert boxes to face_recognition format (top, right, bottom, left)
-            face_locations = []
-            for box in boxes:
-                if len(box) >= 4:
-                    x1, y1, x2, y2 = map(int, box[:4])
-                    # face_recognition uses (top, right, bottom, left)
-                    face_locations.append((y1, x2, y2, x1))
+            boxes = np.asarray(boxes, dtype=np.float32)[:, :4]
+            n = len(boxes)
+            names = [None] * n
+            ttl = np.full(n, self.config.TRACK_TTL, dtype=np.int32)
             
-            if len(face_locations) == 0:
-                return []
+            # Boxes that overlap a face recognized last pass keep its name until the TTL runs out
+            soa = _to_soa(boxes)
+            if self._track_soa.shape[1] > 0:
+                iou = _box_iou(soa, self._track_soa)
+                best = iou.argmax(axis=1)
+                hit = (iou[np.arange(n), best] >= self.config.TRACK_IOU_THRESHOLD) & (self._track_ttl[best] > 1)
+                for i in np.flatnonzero(hit).tolist():
+                    names[i] = self._track_names[best[i]]
+                    ttl[i] = self._track_ttl[best[i]] - 1
             
-            # Extract face encodings from the frame
-            # face_recognition expects RGB format (which picamera2 provides)
-            face_encodings = face_recognition.face_encodings(frame, face_locations)
-            
-            # Match each face encoding with known faces
-            names = []
-            for face_encoding in face_encodings:
-                # Compare with known faces
-                matches = face_recognition.compare_faces(
-                    self.known_face_encodings, 
-                    face_encoding, 
-                    tolerance=self.config.RECOGNITION_TOLERANCE
-                )
-                
-                # Find the best match
-                name = "Unknown"
-                if True in matches:
-                    # Get the distances to all known faces
-                    face_distances = face_recognition.face_distance(
-                        self.known_face_encodings, 
-                        face_encoding
-                    )
-                    # Get the index of the best match
-                    best_match_index = np.argmin(face_distances)
-                    if matches[best_match_index]:
-                        name = self.known_face_names[best_match_index]
-                
-                names.append(name)
+            misses = [i for i in range(n) if names[i] is None]
+            if misses:
+                names_new = self._match_encodings(frame, boxes[misses])
+                for i, name in zip(misses, names_new):
+                    names[i] = name
             
+            self._track_soa, self._track_names, self._track_ttl = soa, list(names), ttl
             return names
             
         except Exception as e:
             print(f"⚠️ Error in face recognition: {e}")
-            return ["Unknown"] * len(boxes) if boxes else []
+            return ["Unknown"] * len(boxes)
     
-    def draw_detections(self, frame, boxes, scores, names=None):
+    def _match_encodings(self, frame, boxes):
         """
-        Draw bounding boxes and labels on the frame using PIL
+        Encode the faces in boxes and match them against the known encodings
         
         Args:
             frame: Input frame (numpy array, RGB format)
-            boxes: List of bounding boxes (numpy array or list)
-            scores: List of confidence scores (numpy array or list)
+            boxes: (N, 4) float32 array of bounding boxes
+            
+        Returns:
+            list: N names ("Unknown" for unrecognized faces)
+        """
+        if self._arcface is not None:
+            return self._match_arcface(frame, boxes)
+        
+        # Encodings are computed on an aligned face chip, so a decimated frame gives
+        # nearly the same result with far fewer pixels through dlib
+        step = max(1, int(self.config.RECOGNITION_DOWNSCALE))
+        if step > 1:
+            frame = np.ascontiguousarray(frame[::step, ::step])
+        
+        # face_recognition uses (top, right, bottom, left)
+        face_locations = [
+            (y1 // step, x2 // step, y2 // step, x1 // step)
+            for x1, y1, x2, y2 in boxes.astype(np.int32).tolist()
+        ]
+        
+        # Extract face encodings from the frame
+        # face_recognition expects RGB format (which picamera2 provides)
+        face_encodings = face_recognition.face_encodings(
+            frame, face_locations, num_jitters=1, model=self.config.RECOGNITION_LANDMARK_MODEL
+        )
+        
+        if len(face_encodings) != len(face_locations):
+            return ["Unknown"] * len(face_locations)
+        
+        # Squared L2 distances of every face to every known encoding in one GEMM:
+        # |q - k|^2 = |q|^2 + |k|^2 - 2 q.k
+        query = np.asarray(face_encodings, dtype=np.float32)
+        d2 = (np.einsum('ij,ij->i', query, query)[:, None]
+              + self._known_sq[None, :]
+              - 2.0 * (query @ self._known_mat.T))
+        best = d2.argmin(axis=1)
+        best_dist = np.sqrt(np.maximum(d2[np.arange(len(best)), best], 0.0))
+        
+        # Best match wins if it is within tolerance (same rule as compare_faces)
+        tolerance = self.config.RECOGNITION_TOLERANCE
+        return [
+            self.known_face_names[idx] if dist <= tolerance else "Unknown"
+            for idx, dist in zip(best.tolist(), best_dist.tolist())
+        ]
+    
+    def _match_arcface(self, frame, boxes):
+        """
+        Embed the faces in boxes with the ONNX model and match them by cosine similarity
+        
+        Args:
+            frame: Input frame (numpy array, RGB format)
+            boxes: (N, 4) float32 array of bounding boxes
+            
+        Returns:
+            list: N names ("Unknown" for unrecognized faces)
+        """
+        input_name, batch_size, (height, width) = self._arcface_input
+        H, W = frame.shape[:2]
+        
+        # Plain resize of each box to the model input (no landmark alignment)
+        crops = []
+        for x1, y1, x2, y2 in boxes.astype(np.int32).tolist():
+            x1, y1 = min(max(x1, 0), W - 1), min(max(y1, 0), H - 1)
+            crop = frame[y1:max(y2, y1 + 1), x1:max(x2, x1 + 1)]
+            crops.append(np.asarray(Image.fromarray(crop).resize((width, height), Image.Resampling.BILINEAR)))
+        batch = np.stack(crops).astype(np.float32)
+        batch -= 127.5
+        batch /= 128.0
+        batch = np.ascontiguousarray(batch.transpose(0, 3, 1, 2))  # NHWC -> NCHW
+        
+        # One forward pass for all faces, unless the model has a fixed batch size
+        if batch_size is None:
+            emb = self._arcface.run(None, {input_name: batch})[0]
+        else:
+            n = len(batch)
+            padded = np.zeros((-(-n // batch_size) * batch_size,) + batch.shape[1:], dtype=np.float32)
+            padded[:n] = batch
+            emb = np.concatenate([self._arcface.run(None, {input_name: padded[i:i + batch_size]})[0]
+                                  for i in range(0, len(padded), batch_size)])[:n]
+        emb = emb.reshape(len(batch), -1).astype(np.float32)
+        emb /= np.linalg.norm(emb, axis=1, keepdims=True) + 1e-6
+        
+        sim = emb @ self._known_mat.T
+        best = sim.argmax(axis=1)
+        best_sim = sim[np.arange(len(best)), best]
+        
+        threshold = self.config.ARCFACE_SIMILARITY_THRESHOLD
+        return [
+            self.known_face_names[idx] if s >= threshold else "Unknown"
+            for idx, s in zip(best.tolist(), best_sim.tolist())
+        ]
+    
+    def draw_detections(self, frame, boxes, scores, names=None):
         """
-        # Convert to lists if numpy arrays
-        if isinstance(boxes, np.ndarray):
-            boxes = boxes.tolist()
-        if isinstance(scores, np.ndarray):
-            scores = scores.tolist()
+        Draw bounding boxes and labels on the frame in place
         
-        # Ensure boxes and scores are lists
-        if not isinstance(boxes, list):
-            boxes = list(boxes) if boxes else []
-        if not isinstance(scores, list):
-            scores = list(scores) if scores else []
+        Boxes and label backgrounds are written straight into the numpy buffer;
+        PIL only renders each label's text into a small mask.
         
+        Args:
+            frame: Input frame (numpy array, RGB format), modified in place
+            boxes: (N, 4) array of bounding boxes
+            scores: (N,) array of confidence scores
+            
+        Returns:
+            The same frame array (for chaining)
+        """
         # Safety check: ensure boxes and scores have same length
         min_len = min(len(boxes), len(scores))
         if min_len == 0:
             return frame
         
-        boxes = boxes[:min_len]
-        scores = scores[:min_len]
-        
-        # Convert to PIL Image for drawing
-        pil_image = Image.fromarray(frame)
-        draw = ImageDraw.Draw(pil_image)
-        
-        # Try to load a font, fall back to default if not available
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 16)
-        except:
-            try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", 16)
-            except:
-                font = ImageFont.load_default()
+        # Convert coordinates and scores once for the whole batch
+        boxes = boxes[:min_len, :4].astype(np.int32).tolist()
+        scores = scores[:min_len].tolist()
         
         # Ensure names list matches boxes length
         if names is None:
@@ -973,16 +1390,7 @@ class RaspberryPiFaceDetector:
         
         for i, (box, score) in enumerate(zip(boxes, scores)):
             try:
-                # Ensure box is a list/array with 4 elements
-                if not box or len(box) < 4:
-                    continue
-                x1, y1, x2, y2 = map(int, box[:4])
-                
-                # Ensure score is a number
-                if isinstance(score, (np.ndarray, np.generic)):
-                    score = float(score)
-                else:
-                    score = float(score)
+                x1, y1, x2, y2 = box
                 
                 # Get name for this face
                 name = names[i] if i < len(names) else "Unknown"
@@ -996,94 +1404,104 @@ class RaspberryPiFaceDetector:
                 # Only show accuracy (confidence score) as percentage
                 label = f"{score:.1%}"
                 
-                # Draw bounding box
-                draw.rectangle([x1, y1, x2, y2], outline=box_color, width=2)
-                
-                # Get text size for background
-                bbox = draw.textbbox((0, 0), label, font=font)
-                text_width = bbox[2] - bbox[0]
-                text_height = bbox[3] - bbox[1]
+                # Draw bounding box (2px outline)
+                _fill_rect(frame, x1, y1, x2 + 1, y1 + 2, box_color)
+                _fill_rect(frame, x1, y2 - 1, x2 + 1, y2 + 1, box_color)
+                _fill_rect(frame, x1, y1, x1 + 2, y2 + 1, box_color)
+                _fill_rect(frame, x2 - 1, y1, x2 + 1, y2 + 1, box_color)
                 
-                # Draw background rectangle for text
-                draw.rectangle([x1, y1 - text_height - 4, x1 + text_width + 4, y1], 
-                              fill=box_color)
-                
-                # Draw text
-                draw.text((x1 + 2, y1 - text_height - 2), label, fill=(0, 0, 0), font=font)
+                # Stamp the pre-rendered label (background + text) above the box
+                sprite = self._label_sprite(label, box_color)
+                _blit_sprite(frame, x1, y1 + 1 - sprite.shape[0], sprite)
             except (ValueError, TypeError, IndexError, AttributeError) as e:
                 # Skip this detection if there's an error
                 continue
         
-        # Convert back to numpy array
-        return np.array(pil_image)
+        return frame
+    
+    def _label_sprite(self, label, color):
+        """
+        Get the rendered image of a detection label, rendering it on first use
+        
+        Labels are score percentages, so only a bounded set ever occurs and each
+        is rasterized by the font engine once.
+        
+        Args:
+            label: Label text
+            color: Background color (RGB tuple)
+            
+        Returns:
+            (h, w, 3) uint8 array: black text on a color background with a 2px margin
+        """
+        key = (label, color)
+        sprite = self._label_sprites.get(key)
+        if sprite is None:
+            if len(self._label_sprites) >= 4096:
+                self._label_sprites.clear()
+            text_mask = _text_mask(label, self._font_box)
+            text_height, text_width = text_mask.shape
+            sprite = np.empty((text_height + 5, text_width + 5, 3), dtype=np.uint8)
+            sprite[:] = color
+            _blit_mask(sprite, 2, 2, text_mask, (0, 0, 0))
+            self._label_sprites[key] = sprite
+        return sprite
     
     def add_performance_info(self, frame):
         """
-        Add performance information overlay to the frame using PIL
+        Add performance information overlay to the frame in place
         
         Args:
-            frame: Input frame (numpy array, RGB format)
+            frame: Input frame (numpy array, RGB format), modified in place
         """
         if not self.config.SHOW_FPS and not self.config.SHOW_DETECTION_INFO and not self.config.SHOW_PERFORMANCE_STATS:
             return frame
         
         # Validate frame
-        if frame is None or (isinstance(frame, np.ndarray) and frame.size == 0):
+        if frame is None or frame.size == 0:
             return frame
         
         try:
-            # Convert to PIL Image
-            pil_image = Image.fromarray(frame)
-            draw = ImageDraw.Draw(pil_image)
-            
-            # Try to load a font
-            try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 14)
-            except:
-                try:
-                    font = ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", 14)
-                except:
-                    font = ImageFont.load_default()
-            
-            info_lines = []
-            y_offset = 10
-            
-            # FPS information
-            if self.config.SHOW_FPS:
-                info_lines.append(f"FPS: {self.current_fps:.1f}")
-            
-            # Detection information
-            if self.config.SHOW_DETECTION_INFO:
-                num_faces = len(self.last_boxes) if isinstance(self.last_boxes, (list, np.ndarray)) else 0
-                info_lines.append(f"Faces: {num_faces}")
-                if self.processing_times and len(self.processing_times) > 0:
-                    try:
-                        avg_time = np.mean(self.processing_times[-10:])  # Last 10 frames
-                        info_lines.append(f"Avg Time: {avg_time*1000:.1f}ms")
-                    except (ValueError, TypeError):
-                        pass  # Skip if calculation fails
-            
-            # Performance stats
-            if self.config.SHOW_PERFORMANCE_STATS:
-                info_lines.append(f"Frame: {self.frame_count}")
-                info_lines.append(f"Queue: {self.frame_queue.qsize()}")
+            # The displayed values need not change every frame, so only re-render every 5th
+            if self.frame_count % 5 == 0 or not self._hud_masks:
+                info_lines = []
+                
+                # FPS information
+                if self.config.SHOW_FPS:
+                    info_lines.append(f"FPS: {self.current_fps:.1f}")
+                
+                # Detection information
+                if self.config.SHOW_DETECTION_INFO:
+                    num_faces = self.last_num_faces
+                    info_lines.append(f"Faces: {num_faces}")
+                    if self.processing_times:
+                        info_lines.append(f"Avg Time: {self.current_proc_time*1000:.1f}ms")
+                
+                # Performance stats
+                if self.config.SHOW_PERFORMANCE_STATS:
+                    info_lines.append(f"Frame: {self.frame_count}")
+                    info_lines.append(f"Queue: {self.frame_queue.qsize()}")
+                
+                self._hud_masks = [_text_mask(line, self._font_hud) for line in info_lines]
             
             # Draw information
-            for i, line in enumerate(info_lines):
-                # Draw text with outline for visibility
+            y_offset = 10
+            for i, mask in enumerate(self._hud_masks):
                 x, y = 10, y_offset + i * 20
-                draw.text((x, y), line, fill=self.config.TEXT_COLOR, font=font)
+                _blit_mask(frame, x, y, mask, self.config.TEXT_COLOR)
             
-            # Convert back to numpy array
-            return np.array(pil_image)
+            return frame
         except Exception as e:
             # Return original frame if there's an error
             return frame
     
-    def calculate_fps(self):
-        """Calculate current FPS"""
+    def calculate_fps(self, current_time):
+        """
+        Calculate current FPS
+        
+        Args:
+            current_time: Timestamp of the current loop iteration (time.time())
+        """
         self.fps_counter += 1
-        current_time = time.time()
         
         try:
             time_diff = current_time - self.fps_start_time
@@ -1094,33 +1512,485 @@ class RaspberryPiFaceDetector:
                     self.current_fps = 0.0
                 self.fps_counter = 0
                 self.fps_start_time = current_time
+                
+                if self.config.ADAPTIVE_SKIP_FRAMES:
+                    self._tune_skip()
         except (ZeroDivisionError, ValueError):
             self.current_fps = 0.0
     
+    def _tune_skip(self):
+        """
+        Match SKIP_FRAMES to the measured processing time
+        
+        Processes a frame only as often as detection + recognition can keep
+        up with the camera frame rate, so no backlog builds up. Uses the EWMA
+        of the processing time so load changes show up within a few results.
+        """
+        if not self.processing_times:
+            return
+        
+        frame_interval = 1.0 / self.config.CAMERA_FPS
+        skip = max(0, math.ceil(self._proc_ewma / frame_interval) - 1)
+        if skip != self.config.SKIP_FRAMES:
+            self.config.SKIP_FRAMES = skip
+            if self._camera_paced:
+                self._pace_camera()
+    
+    def _over_latency_target(self):
+        """
+        Check whether a frame queued now would miss LATENCY_TARGET_MS
+        
+        Its result arrives after the frames already waiting in the pipeline
+        plus itself, each taking about the EWMA processing time. With nothing
+        waiting the frame is always processed, so the estimate keeps updating.
+        """
+        target_ms = self.config.LATENCY_TARGET_MS
+        if target_ms <= 0 or not self.config.ENABLE_PARALLEL_PROCESSING:
+            return False
+        
+        backlog = self.frame_queue.qsize() + self.recognition_queue.qsize()
+        return backlog > 0 and self._proc_ewma * (backlog + 1) * 1000.0 > target_ms
+    
+    def _pace_camera(self):
+        """
+        Let the camera skip frames instead of capturing and discarding them
+        
+        Only used without a display window: every captured frame is then
+        processed, so the sensor is slowed to CAMERA_FPS / (SKIP_FRAMES + 1)
+        via FrameDurationLimits and skipped frames are never produced. With
+        a window, skipped frames are still shown, so capture stays at full rate.
+        """
+        if self.display_enabled or self.picam2 is None:
+            return
+        
+        duration = int(1e6 * (self.config.SKIP_FRAMES + 1) / self.config.CAMERA_FPS)  # microseconds
+        try:
+            self.picam2.set_controls({"FrameDurationLimits": (duration, duration)})
+            self._camera_paced = True
+        except Exception as e:
+            print(f"⚠️  Could not set camera frame duration, skipping frames after capture: {e}")
+            self._camera_paced = False
+    
+    @staticmethod
+    def _put_latest(q, item):
+        """Queue item without blocking, dropping the oldest queued item if full"""
+        while True:
+            try:
+                q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+    
     def process_frames_parallel(self):
-        """Process frames in a separate thread for parallel processing"""
-        while self.is_running:
+        """Detection stage: run YOLO on queued frames in a separate thread"""
+        while not self._stop_event.is_set():
             try:
-                frame, frame_id = self.frame_queue.get(timeout=1.0)
+                items = [self.frame_queue.get(timeout=1.0)]
+                # Batch whatever else is already waiting, up to DETECT_BATCH_SIZE frames
+                while len(items) < self.config.DETECT_BATCH_SIZE:
+                    try:
+                        items.append(self.frame_queue.get_nowait())
+                    except queue.Empty:
+                        break
                 
                 # Perform face detection
-                start_time = time.time()
-                boxes, scores = self.detect_faces(frame)
+                start_time = time.monotonic()
+                if len(items) == 1:
+                    frame, det_frame, _ = items[0]
+                    detections = [self.detect_faces(det_frame, frame.shape)]
+                else:
+                    detections = self.detect_faces_batch([item[1] for item in items],
+                                                         [item[0].shape for item in items])
+                detection_time = (time.monotonic() - start_time) / len(items)  # Amortized per frame
+                
+                # Detection frames are done with; the main frames go on to recognition
+                for frame, det_frame, _ in items:
+                    if det_frame is not frame:
+                        self._release_buffer("lores", det_frame)
+                
+                # Hand over to the recognition stage (oldest first, so the newest survives a full queue)
+                for (frame, _, frame_id), (boxes, scores) in zip(items, detections):
+                    self._put_latest(self.recognition_queue, (frame, boxes, scores, detection_time, frame_id))
+                
+            except queue.Empty:
+                continue
+            except Exception as e:
+                print(f"⚠️ Error in parallel processing: {e}")
+    
+    def recognize_frames_parallel(self):
+        """Recognition stage: identify detected faces in a separate thread"""
+        while not self._stop_event.is_set():
+            try:
+                frame, boxes, scores, detection_time, frame_id = self.recognition_queue.get(timeout=1.0)
                 
                 # Recognize faces if enabled (this adds some processing time)
+                start_time = time.monotonic()
                 names = []
                 if self.face_recognition_enabled and len(boxes) > 0:
                     names = self.recognize_faces(frame, boxes)
                 
-                processing_time = time.time() - start_time
+                processing_time = detection_time + (time.monotonic() - start_time)
+                
+                # Last stage to read the frame; the result only carries the detections
+                self._release_buffer("main", frame)
                 
-                # Put result in queue (including names)
-                self.result_queue.put((frame, boxes, scores, names, processing_time, frame_id))
+                # Put result in queue (including names) and wake the capture loop
+                self._put_latest(self.result_queue, (None, boxes, scores, names, processing_time, frame_id))
+                self._result_ready.set()
                 
             except queue.Empty:
                 continue
             except Exception as e:
-                print(f"⚠️ Error in parallel processing: {e}")
+                print(f"⚠️ Error in parallel recognition: {e}")
+    
+    def _dispatch_event(self, kind, *args):
+        """
+        Queue an n8n event/alert for the background event worker
+        
+        Args:
+            kind: "detection", "verified" or "unknown"
+            *args: Arguments for the matching send_* method
+        """
+        if self._event_queue.qsize() >= self._event_queue_max:
+            return  # Drop event rather than stall the capture loop or grow without bound
+        self._event_queue.put((kind, args))
+    
+    def _event_worker(self):
+        """Send queued events/alerts in a background thread"""
+        senders = {
+            "detection": self.send_detection_event,
+            "verified": self.send_verified_person_alert,
+            "unknown": self.send_unknown_person_alert,
+        }
+        while True:
+            kind, args = self._event_queue.get()
+            try:
+                senders[kind](*args)
+            except Exception as e:
+                print(f"⚠️  Error in event worker: {e}")
+    
+    def _log_detections(self, now):
+        """
+        Queue a console line for the latest detection results (rate-limited)
+        
+        Args:
+            now: Timestamp of the current loop iteration (time.time())
+        """
+        num_faces = self.last_num_faces
+        if num_faces == 0 or now - self._last_log_time < self.config.CONSOLE_LOG_INTERVAL:
+            return
+        self._last_log_time = now
+        
+        # last_scores_list/last_names are replaced, never mutated, so they can be handed over as-is
+        names = self.last_names if self.face_recognition_enabled else []
+        try:
+            self._log_queue.put_nowait((self.frame_count, num_faces, self.current_fps, self.last_scores_list, names))
+        except queue.Full:
+            pass  # Drop the line rather than stall the capture loop
+    
+    def _log_worker(self):
+        """Format and log queued detection lines in a background thread"""
+        while True:
+            frame_count, num_faces, fps, scores, names = self._log_queue.get()
+            scores_str = [f'{s:.2f}' for s in scores]
+            
+            # Names field only when recognition produced names
+            names_suffix = f" | Names: {', '.join(names)}" if names else ""
+            logger.info("Frame %d: %d face(s) detected | FPS: %.1f%s | Confidence: %s",
+                        frame_count, num_faces, fps, names_suffix, scores_str)
+    
+    def _record_processing_time(self, processing_time):
+        """
+        Add a processing time to the fixed-size history and update its mean
+        
+        Keeps a running sum so the mean is O(1) instead of re-summing the history;
+        the sum is recomputed exactly each time the window turns over so float
+        error cannot accumulate.
+        """
+        times = self.processing_times
+        if len(times) == times.maxlen:
+            self._pt_sum -= times[0]
+        times.append(processing_time)
+        self._pt_sum += processing_time
+        self._pt_appends += 1
+        if self._pt_appends % times.maxlen == 0:
+            self._pt_sum = math.fsum(times)
+        self.current_proc_time = self._pt_sum / len(times)
+        
+        if self._pt_appends == 1:
+            self._proc_ewma = processing_time
+        else:
+            self._proc_ewma += self.config.PROC_TIME_EWMA_ALPHA * (processing_time - self._proc_ewma)
+    
+    def _split_unknowns(self, boxes, scores, names):
+        """
+        Select the boxes and scores of faces that were not recognized
+        
+        Returns:
+            tuple: (unknown_boxes, unknown_scores) arrays
+        """
+        unknown = np.array([name == "Unknown" or name is None for name in names], dtype=bool)
+        return boxes[:len(unknown)][unknown], scores[:len(unknown)][unknown]
+    
+    def _consume_result(self, frame, boxes, scores, names, processing_time, now):
+        """
+        Store a detection result, draw it and dispatch alerts
+        
+        Shared by the parallel and synchronous processing paths.
+        
+        Args:
+            frame: Current frame (numpy array, RGB format)
+            boxes: (N, 4) float32 array of detected bounding boxes
+            scores: (N,) float32 array of confidence scores
+            names: Recognized names
+            processing_time: Detection + recognition time in seconds
+            now: Timestamp of the current loop iteration (time.time())
+            
+        Returns:
+            Frame with detections drawn
+        """
+        # detect_faces() returns float32 arrays; keep them as-is
+        self.last_boxes = boxes
+        self.last_scores = scores
+        self.last_num_faces = boxes.shape[0]
+        self.last_scores_list = scores.tolist()
+        self.last_names = names if names else []
+        self.last_detection_time = now
+        self._record_processing_time(processing_time)
+        
+        # Draw detections with names
+        self.draw_detections(frame, boxes, scores, self.last_names)
+        
+        # Nothing else to do for an empty result
+        if not self.last_num_faces:
+            return frame
+        names = self.last_names
+        # The capture ring reuses this buffer, so events get a JPEG encoded here
+        # instead of a frame copy - and only for events that will actually be sent
+        can_send = self.n8n_client and self.create_detection_event
+        
+        # Send detection event to n8n if enabled (general events)
+        if can_send:
+            self._dispatch_event("detection", boxes, scores, names, self._encode_event_frame(frame))
+        
+        # Check for verified persons and send alert (95%+ confidence)
+        # This runs independently of general n8n integration
+        if self.config.ENABLE_VERIFIED_PERSON_ALERTS and can_send and self.face_recognition_enabled:
+            verified = self._verified_alert_indices(scores, names, now)
+            if verified:
+                verified_boxes = boxes[verified]
+                self._dispatch_event("verified",
+                                     verified_boxes,
+                                     scores[verified],
+                                     [names[i] for i in verified],
+                                     self._encode_event_frame(self._crop_to_boxes(frame, verified_boxes)))
+        
+        # Check for unknown persons and send alert
+        # This runs independently and automatically sends to n8n when triggered
+        if self.config.ENABLE_UNKNOWN_PERSON_ALERTS:
+            unknown_boxes, unknown_scores = self._split_unknowns(boxes, scores, names)
+            unknown = self._unknown_alert_indices(unknown_boxes, now)
+            if unknown:
+                unknown_boxes = unknown_boxes[unknown]
+                # Without a client or webhook URL the worker only reports that alerts are off
+                frame_jpeg = None
+                if self.n8n_client or self.config.N8N_WEBHOOK_URL:
+                    frame_jpeg = self._encode_event_frame(self._crop_to_boxes(frame, unknown_boxes))
+                self._dispatch_event("unknown", unknown_boxes, unknown_scores[unknown], frame_jpeg)
+        
+        return frame
+    
+    def _verified_alert_indices(self, scores, names, now):
+        """
+        Select recognized faces that pass the confidence threshold and whose
+        per-person alert cooldown has expired, starting a new cooldown for them
+        
+        Args:
+            scores: (N,) float32 array of confidence scores
+            names: Recognized names
+            now: Timestamp of the current loop iteration (time.time())
+            
+        Returns:
+            list: Indices of the faces to alert on
+        """
+        threshold = self.config.VERIFIED_PERSON_CONFIDENCE_THRESHOLD
+        known = np.array([bool(name) and name != "Unknown" for name in names], dtype=bool)
+        selected = []
+        for i in np.flatnonzero(known & (scores[:len(known)] >= threshold)).tolist():
+            name = names[i]
+            last_time = self.last_verified_alert_time.get(name)
+            if last_time is not None and now - last_time < self.config.VERIFIED_PERSON_ALERT_COOLDOWN:
+                continue  # Still in cooldown
+            self.last_verified_alert_time[name] = now
+            selected.append(i)
+        return selected
+    
+    def _unknown_alert_indices(self, boxes, now):
+        """
+        Select unknown faces whose alert cooldown (tracked per bbox) has expired,
+        starting a new cooldown for them
+        
+        Args:
+            boxes: (N, 4) float32 array of unknown face boxes
+            now: Timestamp of the current loop iteration (time.time())
+            
+        Returns:
+            list: Indices of the faces to alert on
+        """
+        selected = []
+        for i, box in enumerate(boxes.tolist()):
+            bbox_key = f"{box[0]:.1f},{box[1]:.1f},{box[2]:.1f},{box[3]:.1f}"
+            last_time = self.last_unknown_alert_time.get(bbox_key)
+            if last_time is not None and now - last_time < self.config.UNKNOWN_PERSON_ALERT_COOLDOWN:
+                continue  # Still in cooldown
+            self.last_unknown_alert_time[bbox_key] = now
+            selected.append(i)
+        return selected
+    
+    @staticmethod
+    def _crop_to_boxes(frame, boxes, padding=20):
+        """
+        Crop a frame to the region around all boxes, to show the alerted person(s) clearly
+        
+        Returns:
+            View of the frame (no copy)
+        """
+        h, w = frame.shape[:2]
+        x1 = max(0, int(boxes[:, 0].min()) - padding)
+        y1 = max(0, int(boxes[:, 1].min()) - padding)
+        x2 = min(w, int(boxes[:, 2].max()) + padding)
+        y2 = min(h, int(boxes[:, 3].max()) + padding)
+        return frame[y1:y2, x1:x2]
+    
+    def _encode_event_frame(self, frame):
+        """
+        JPEG-encode a frame (or crop) for an n8n event
+        
+        Runs in the capture loop, before the ring buffer is reused; the event
+        worker only gets the small encoded buffer.
+        
+        Returns:
+            JPEG buffer, or None if encoding failed
+        """
+        try:
+            from api_server import encode_jpeg
+            return encode_jpeg(frame, quality=85)
+        except Exception as e:
+            print(f"⚠️  Error encoding event frame: {e}")
+            return None
+    
+    def _is_static_frame(self, frame, now):
+        """
+        Check whether the scene is unchanged since the last processed frame
+        
+        Compares a coarse subsample of the green channel against the one kept
+        from the last processed frame, which costs far less than a YOLO pass.
+        
+        Args:
+            frame: Current frame (numpy array, RGB format)
+            now: Timestamp of the current loop iteration (time.time())
+            
+        Returns:
+            bool: True if the cached detection results can be reused
+        """
+        threshold = self.config.STATIC_SKIP_THRESHOLD
+        if threshold <= 0:
+            return False
+        
+        thumb = (frame[::20, ::20, 1] if frame.ndim == 3 else frame[::20, ::20]).astype(np.int16)
+        prev = self._prev_thumb
+        
+        # Only reuse results that are less than a second old
+        if prev is not None and prev.shape == thumb.shape and now - self.last_detection_time < 1.0:
+            if np.abs(thumb - prev).mean() < threshold:
+                return True
+        
+        self._prev_thumb = thumb
+        return False
+    
+    def _draw_cached(self, frame):
+        """Draw the most recent detection results on a frame"""
+        return self.draw_detections(frame, self.last_boxes, self.last_scores, self.last_names)
+    
+    def _capture(self):
+        """
+        Capture the next frame from picamera2
+        
+        Returns:
+            tuple: (frame, det_frame) - RGB frame for display/recognition and the
+            frame to run detection on (the lores stream if configured)
+        """
+        self._ring_index += 1
+        
+        # Both streams come from the same request, so they show the same instant
+        request = self.picam2.capture_request()
+        try:
+            width, height = self._main_size
+            with MappedArray(request, "main") as mapped:
+                frame = self._copy_to_ring("main", mapped.array[:height, :width])
+            
+            if self._lores_size is None:
+                return frame, frame
+            
+            width, height = self._lores_size
+            with MappedArray(request, "lores") as mapped:
+                # YUV420: the Y plane is the first `height` rows; rows may be padded to the stride
+                det_frame = self._copy_to_ring("lores", mapped.array[:height, :width])
+            return frame, det_frame
+        finally:
+            request.release()
+    
+    def _copy_to_ring(self, name, src):
+        """
+        Copy a mapped camera buffer into the next preallocated ring buffer
+        
+        Args:
+            name: Stream name ("main" or "lores")
+            src: View of the camera buffer (only valid until the request is released)
+            
+        Returns:
+            numpy array owned by the ring, valid for the next _ring_size captures
+        """
+        ring = self._rings.get(name)
+        if ring is None or ring[0].shape != src.shape:
+            ring = [np.empty(src.shape, dtype=src.dtype) for _ in range(self._ring_size)]
+            self._rings[name] = ring
+        buf = ring[self._ring_index % self._ring_size]
+        np.copyto(buf, src)
+        return buf
+    
+    def _acquire_buffer(self, name, src):
+        """
+        Copy a frame into a buffer owned by one pipeline item
+        
+        Unlike ring buffers, the copy stays valid until the stage that finishes
+        with it calls _release_buffer, however long detection/recognition takes.
+        
+        Args:
+            name: Stream name ("main" or "lores")
+            src: Frame to copy
+            
+        Returns:
+            numpy array owned by the caller
+        """
+        free = self._free_buffers[name]
+        while True:
+            try:
+                buf = free.get_nowait()
+            except queue.Empty:
+                buf = np.empty(src.shape, dtype=src.dtype)
+                break
+            if buf.shape == src.shape and buf.dtype == src.dtype:
+                break  # Stale sizes (stream reconfigured) are discarded
+        np.copyto(buf, src)
+        return buf
+    
+    def _release_buffer(self, name, buf):
+        """Return a buffer from _acquire_buffer to its free-list for reuse"""
+        self._free_buffers[name].put(buf)
     
     def run(self):
         """Main detection loop"""
@@ -1140,18 +2010,67 @@ class RaspberryPiFaceDetector:
         print()
         
         self.is_running = True
-        paused = False
+        self._stop_event.clear()
+        self._pace_camera()
         
-        # Start parallel processing thread
+        # Start parallel processing threads (detection + recognition stages)
         if self.config.ENABLE_PARALLEL_PROCESSING:
-            self.processing_thread = threading.Thread(target=self.process_frames_parallel, daemon=True)
+            self.processing_thread = threading.Thread(target=self.process_frames_parallel, name="detection", daemon=True)
             self.processing_thread.start()
+            self.recognition_thread = threading.Thread(target=self.recognize_frames_parallel, name="recognition", daemon=True)
+            self.recognition_thread.start()
         
         try:
-            while True:
+            if self.display_enabled:
+                # Tk must stay on the main thread: capture/detect runs in the background and
+                # the Tk event loop shows whichever frame is newest when it polls
+                self.capture_thread = threading.Thread(target=self._capture_loop, name="capture", daemon=True)
+                self.capture_thread.start()
+                self.root.after(0, self._poll_display)
+                self.root.mainloop()
+            else:
+                self._capture_loop()
+        
+        except KeyboardInterrupt:
+            print("\n🛑 Interrupted by user")
+        
+        finally:
+            self.cleanup()
+    
+    def _capture_loop(self):
+        """Capture, detect and annotate frames until stopped"""
+        paused = False
+        
+        # Bind per-frame lookups once; these don't change while running.
+        # SKIP_FRAMES and _camera_paced are retuned at runtime, so they are still read live.
+        config = self.config
+        stop_event = self._stop_event
+        result_ready = self._result_ready
+        result_queue = self.result_queue
+        frame_queue = self.frame_queue
+        display_queue = self.display_queue
+        put_latest = self._put_latest
+        consume_result = self._consume_result
+        draw_cached = self._draw_cached
+        capture = self._capture
+        monotonic = time.monotonic
+        base_interval = 1.0 / config.CAMERA_FPS
+        parallel = config.ENABLE_PARALLEL_PROCESSING
+        log_enabled = logger.isEnabledFor  # Checked per frame, so the level can change at runtime
+        display_enabled = self.display_enabled
+        face_rec_on = self.face_recognition_enabled
+        warning_color = config.WARNING_COLOR
+        try:
+            while not stop_event.is_set():
+                # The next frame is due one (effective) camera frame interval from now
+                frame_interval = base_interval
+                if self._camera_paced:
+                    frame_interval *= config.SKIP_FRAMES + 1
+                next_deadline = monotonic() + frame_interval
+                
                 # Read frame from picamera2
                 try:
-                    frame = self.picam2.capture_array()
+                    frame, det_frame = capture()
                     if frame is None or frame.size == 0:
                         print("⚠️  Warning: Empty frame from picamera2")
                         time.sleep(0.1)
@@ -1168,223 +2087,95 @@ class RaspberryPiFaceDetector:
                     continue  # Continue instead of breaking to be more resilient
                 
                 self.frame_count += 1
+                now = time.time()  # Read the clock once per iteration
                 
-                # Skip frames for performance
+                # Skip frames for performance (the camera already does it when paced)
                 should_process = True
-                if self.config.SKIP_FRAMES > 0 and self.frame_count % (self.config.SKIP_FRAMES + 1) != 0:
+                if (not self._camera_paced and config.SKIP_FRAMES > 0
+                        and self.frame_count % (config.SKIP_FRAMES + 1) != 0):
                     should_process = False
+                elif self._over_latency_target():
+                    should_process = False  # Pipeline is backed up; show cached results instead
+                
+                # Reuse the last results instead of re-running detection on a static scene
+                scene_static = should_process and self._is_static_frame(frame, now)
                 
                 # Process frame
                 if not paused:
-                    if self.config.ENABLE_PARALLEL_PROCESSING and should_process:
+                    if parallel and should_process:
                         # Add frame to processing queue
-                        try:
-                            self.frame_queue.put_nowait((frame.copy(), self.frame_count))
-                        except queue.Full:
-                            pass  # Skip frame if queue is full
+                        if not scene_static:
+                            # The ring slot is reused a few captures later, long before a slow
+                            # detection/recognition pass may be done, so queue private copies
+                            item_frame = self._acquire_buffer("main", frame)
+                            item_det = (item_frame if det_frame is frame
+                                        else self._acquire_buffer("lores", det_frame))
+                            put_latest(frame_queue, (item_frame, item_det, self.frame_count))
                         
                         # Get results from result queue
                         try:
-                            processed_frame, boxes, scores, names, processing_time, frame_id = self.result_queue.get_nowait()
-                            # Convert to lists if numpy arrays
-                            if isinstance(boxes, np.ndarray):
-                                self.last_boxes = boxes.tolist()
-                            else:
-                                self.last_boxes = list(boxes) if boxes else []
-                            if isinstance(scores, np.ndarray):
-                                self.last_scores = scores.tolist()
-                            else:
-                                self.last_scores = list(scores) if scores else []
-                            self.last_names = names if names else []
-                            self.last_detection_time = time.time()
-                            self.processing_times.append(processing_time)
-                            
-                            # Keep only last 30 processing times
-                            if len(self.processing_times) > 30:
-                                self.processing_times.pop(0)
-                            
-                            # Draw detections with names
-                            frame = self.draw_detections(frame, boxes, scores, self.last_names)
-                            
-                            # Send detection event to n8n if enabled (general events)
-                            if self.n8n_client and len(boxes) > 0:
-                                self.send_detection_event(boxes, scores, self.last_names, frame)
-                            
-                            # Check for verified persons and send alert (95%+ confidence)
-                            # This runs independently of general n8n integration
-                            if self.config.ENABLE_VERIFIED_PERSON_ALERTS and len(boxes) > 0:
-                                # Filter for verified faces (high confidence, recognized)
-                                verified_boxes = []
-                                verified_scores = []
-                                verified_names = []
-                                for i, (name, score) in enumerate(zip(self.last_names, scores)):
-                                    if name and name != "Unknown" and float(score) >= self.config.VERIFIED_PERSON_CONFIDENCE_THRESHOLD:
-                                        verified_boxes.append(boxes[i])
-                                        verified_scores.append(scores[i])
-                                        verified_names.append(name)
-                                
-                                if len(verified_boxes) > 0:
-                                    self.send_verified_person_alert(verified_boxes, verified_scores, verified_names, frame)
-                            
-                            # Check for unknown persons and send alert
-                            # This runs independently and automatically sends to n8n when triggered
-                            if self.config.ENABLE_UNKNOWN_PERSON_ALERTS and len(boxes) > 0:
-                                # Filter for unknown faces
-                                unknown_boxes = []
-                                unknown_scores = []
-                                for i, name in enumerate(self.last_names):
-                                    if name == "Unknown" or name is None:
-                                        unknown_boxes.append(boxes[i])
-                                        unknown_scores.append(scores[i])
-                                
-                                if len(unknown_boxes) > 0:
-                                    self.send_unknown_person_alert(unknown_boxes, unknown_scores, frame)
+                            _, boxes, scores, names, processing_time, frame_id = result_queue.get_nowait()
+                            frame = consume_result(frame, boxes, scores, names, processing_time, now)
                         except queue.Empty:
                             # Use cached results if no new results available
-                            if time.time() - self.last_detection_time < 0.5:  # Use cache for 0.5 seconds
-                                cached_scores = self.last_scores if len(self.last_scores) == len(self.last_boxes) else [0.9] * len(self.last_boxes)
-                                cached_names = self.last_names if len(self.last_names) == len(self.last_boxes) else ["Unknown"] * len(self.last_boxes)
-                                frame = self.draw_detections(frame, self.last_boxes, cached_scores, cached_names)
+                            if scene_static or now - self.last_detection_time < 0.5:  # Use cache for 0.5 seconds
+                                frame = draw_cached(frame)
                     else:
                         # Synchronous processing
-                        if should_process:
-                            start_time = time.time()
-                            boxes, scores = self.detect_faces(frame)
+                        if scene_static:
+                            frame = draw_cached(frame)
+                        elif should_process:
+                            start_time = monotonic()
+                            boxes, scores = self.detect_faces(det_frame, frame.shape)
                             
                             # Recognize faces if enabled
                             names = []
-                            if self.face_recognition_enabled and len(boxes) > 0:
+                            if face_rec_on and len(boxes) > 0:
                                 names = self.recognize_faces(frame, boxes)
                             
-                            processing_time = time.time() - start_time
-                            # Convert to lists if numpy arrays
-                            if isinstance(boxes, np.ndarray):
-                                self.last_boxes = boxes.tolist()
-                            else:
-                                self.last_boxes = list(boxes) if boxes else []
-                            if isinstance(scores, np.ndarray):
-                                self.last_scores = scores.tolist()
-                            else:
-                                self.last_scores = list(scores) if scores else []
-                            self.last_names = names if names else []
-                            self.last_detection_time = time.time()
-                            self.processing_times.append(processing_time)
-                            
-                            # Keep only last 30 processing times
-                            if len(self.processing_times) > 30:
-                                self.processing_times.pop(0)
-                            
-                            # Draw detections with names
-                            frame = self.draw_detections(frame, boxes, scores, self.last_names)
-                            
-                            # Send detection event to n8n if enabled (general events)
-                            if self.n8n_client and len(boxes) > 0:
-                                self.send_detection_event(boxes, scores, self.last_names, frame)
-                            
-                            # Check for verified persons and send alert (95%+ confidence)
-                            # This runs independently of general n8n integration
-                            if self.config.ENABLE_VERIFIED_PERSON_ALERTS and len(boxes) > 0:
-                                # Filter for verified faces (high confidence, recognized)
-                                verified_boxes = []
-                                verified_scores = []
-                                verified_names = []
-                                for i, (name, score) in enumerate(zip(self.last_names, scores)):
-                                    if name and name != "Unknown" and float(score) >= self.config.VERIFIED_PERSON_CONFIDENCE_THRESHOLD:
-                                        verified_boxes.append(boxes[i])
-                                        verified_scores.append(scores[i])
-                                        verified_names.append(name)
-                                
-                                if len(verified_boxes) > 0:
-                                    self.send_verified_person_alert(verified_boxes, verified_scores, verified_names, frame)
-                            
-                            # Check for unknown persons and send alert
-                            # This runs independently and automatically sends to n8n when triggered
-                            if self.config.ENABLE_UNKNOWN_PERSON_ALERTS and len(boxes) > 0:
-                                # Filter for unknown faces
-                                unknown_boxes = []
-                                unknown_scores = []
-                                for i, name in enumerate(self.last_names):
-                                    if name == "Unknown" or name is None:
-                                        unknown_boxes.append(boxes[i])
-                                        unknown_scores.append(scores[i])
-                                
-                                if len(unknown_boxes) > 0:
-                                    self.send_unknown_person_alert(unknown_boxes, unknown_scores, frame)
+                            processing_time = monotonic() - start_time
+                            frame = consume_result(frame, boxes, scores, names, processing_time, now)
                 
                 # Calculate FPS
-                self.calculate_fps()
+                self.calculate_fps(now)
                 
                 # Performance information disabled - no text overlays
                 # frame = self.add_performance_info(frame)
                 
-                # Print to console if enabled
-                if self.config.PRINT_TO_CONSOLE and should_process:
-                    num_faces = len(self.last_boxes) if isinstance(self.last_boxes, (list, np.ndarray)) else 0
-                    if num_faces > 0:
-                        # Format scores safely
-                        try:
-                            # Convert scores to list of floats
-                            score_list = []
-                            for s in self.last_scores:
-                                if isinstance(s, (np.ndarray, np.generic)):
-                                    score_list.append(float(s))
-                                else:
-                                    score_list.append(float(s))
-                            scores_str = [f'{s:.2f}' for s in score_list]
-                        except (ValueError, TypeError):
-                            scores_str = ['N/A'] * num_faces
-                        
-                        # Format names if recognition is enabled
-                        if self.face_recognition_enabled and len(self.last_names) > 0:
-                            names_str = ", ".join(self.last_names)
-                            print(f"Frame {self.frame_count}: {num_faces} face(s) detected | "
-                                  f"FPS: {self.current_fps:.1f} | "
-                                  f"Names: {names_str} | "
-                                  f"Confidence: {scores_str}")
-                        else:
-                            print(f"Frame {self.frame_count}: {num_faces} face(s) detected | "
-                                  f"FPS: {self.current_fps:.1f} | "
-                                  f"Confidence: {scores_str}")
+                # Log to console if INFO is enabled
+                if should_process and log_enabled(logging.INFO):
+                    self._log_detections(now)
                 
                 # Add pause indicator
                 if paused:
-                    try:
-                        pil_image = Image.fromarray(frame)
-                        draw = ImageDraw.Draw(pil_image)
-                        try:
-                            font = ImageFont.load_default()
-                        except:
-                            font = None
-                        frame_height = frame.shape[0] if isinstance(frame, np.ndarray) else pil_image.height
-                        draw.text((10, frame_height - 20), "PAUSED - Press Ctrl+C to quit", 
-                                 fill=self.config.WARNING_COLOR, font=font)
-                        frame = np.array(pil_image)
-                    except Exception:
-                        pass  # Skip pause indicator if there's an error
-                
-                # Update display window
-                self.update_display(frame)
+                    _blit_mask(frame, 10, frame.shape[0] - 20, self._paused_mask, warning_color)
                 
-                # Check if window was closed
-                if not self.is_running:
-                    break
+                # Hand the frame to the display (latest frame wins)
+                if display_enabled:
+                    put_latest(display_queue, frame)
                 
-                # Small delay to prevent overwhelming the system
-                time.sleep(0.01)
-        
-        except KeyboardInterrupt:
-            print("\n🛑 Interrupted by user")
+                # capture_request() already blocks on the camera, so only wait if this
+                # iteration finished early - and wake as soon as a new result is ready
+                result_ready.wait(timeout=max(0.0, next_deadline - monotonic()))
+                result_ready.clear()
         
         finally:
-            self.cleanup()
+            self.is_running = False
+            self._stop_event.set()
     
     def cleanup(self):
         """Clean up resources"""
         print("🧹 Cleaning up...")
         self.is_running = False
+        self._stop_event.set()
+        self._result_ready.set()  # Wake the capture loop if it is waiting for a result
         
-        if self.processing_thread and self.processing_thread.is_alive():
-            self.processing_thread.join(timeout=1.0)
+        # Stop every thread that may touch the camera before stopping it
+        for thread in (self.capture_thread, self.processing_thread, self.recognition_thread):
+            if thread and thread.is_alive():
+                thread.join(timeout=3.0)
+                if thread.is_alive():
+                    print(f"⚠️  {thread.name} thread did not stop in time")
         
         # Clean up camera
         if self.picam2:
@@ -1393,12 +2184,15 @@ class RaspberryPiFaceDetector:
             except:
                 pass
         
-        # Clean up display window
-        if self.root:
+        # Clean up display window (only once, even if cleanup runs again)
+        if self.root is not None:
             try:
+                self.root.update()
                 self.root.destroy()
             except:
                 pass
+            finally:
+                self.root = None
         
         print("✅ Cleanup complete")
 
@@ -1406,6 +2200,27 @@ class RaspberryPiFaceDetector:
 # MAIN FUNCTION
 # ============================================================================
 
+def _ranged_float(lo, hi):
+    """
+    Build an argparse type that parses a float within [lo, hi]
+    
+    Args:
+        lo: Minimum allowed value
+        hi: Maximum allowed value
+        
+    Returns:
+        Callable for the type= argument of add_argument
+    """
+    def parse(text):
+        try:
+            value = float(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid float value: {text!r}")
+        if not (lo <= value <= hi):
+            raise argparse.ArgumentTypeError(f"must be between {lo} and {hi}")
+        return value
+    return parse
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description="Raspberry Pi 5 Face Detection System (Picamera2 Only)")
@@ -1413,42 +2228,48 @@ def main():
     default_model = str(Config.BASE_DIR / "models" / "yolov12n-face.pt")
     parser.add_argument("--model", type=str, default=default_model, 
                        help="Path to YOLO model file")
-    parser.add_argument("--conf", type=float, default=0.5, 
+    parser.add_argument("--model-format", choices=["pt", *RaspberryPiFaceDetector.EXPORT_FORMATS],
+                       default=Config.MODEL_FORMAT,
+                       help="Run YOLO as PyTorch or an exported model (exported on first use)")
+    parser.add_argument("--conf", type=_ranged_float(0.0, 1.0), default=0.5, 
                        help="Confidence threshold (0.0-1.0)")
     parser.add_argument("--width", type=int, default=640, 
                        help="Camera width")
     parser.add_argument("--height", type=int, default=480, 
                        help="Camera height")
-    parser.add_argument("--resize", type=float, default=0.75, 
+    parser.add_argument("--resize", type=_ranged_float(0.1, 1.0), default=0.75, 
                        help="Resize factor for processing (0.1-1.0)")
-    parser.add_argument("--skip-frames", type=int, default=2, 
-                       help="Number of frames to skip between processing")
+    parser.add_argument("--skip-frames", type=int, default=None, 
+                       help="Number of frames to skip between processing (default: adaptive)")
+    parser.add_argument("--latency-target-ms", type=float, default=0,
+                       help="Skip detection on frames whose result would exceed this latency (default: off)")
     parser.add_argument("--no-parallel", action="store_true", 
                        help="Disable parallel processing")
-    parser.add_argument("--no-console", action="store_true",
-                       help="Disable console output")
+    parser.add_argument("--fast-recognition", action="store_true",
+                       help="Encode faces on a 2x decimated frame (faster, may be less accurate)")
+    parser.add_argument("--log-level", type=str.upper, default="INFO",
+                       choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                       help="Level for detection log lines (WARNING disables them)")
     
     args = parser.parse_args()
+    logging.basicConfig(format="%(message)s")
     
     # Create configuration
     config = Config()
     config.MODEL_PATH = args.model
+    config.MODEL_FORMAT = args.model_format
     config.CONFIDENCE_THRESHOLD = args.conf
     config.CAMERA_WIDTH = args.width
     config.CAMERA_HEIGHT = args.height
     config.RESIZE_FACTOR = args.resize
-    config.SKIP_FRAMES = args.skip_frames
+    if args.skip_frames is not None:
+        config.SKIP_FRAMES = args.skip_frames
+        config.ADAPTIVE_SKIP_FRAMES = False
+    config.LATENCY_TARGET_MS = args.latency_target_ms
     config.ENABLE_PARALLEL_PROCESSING = not args.no_parallel
-    config.PRINT_TO_CONSOLE = not args.no_console
-    
-    # Validate arguments
-    if not (0.0 <= args.conf <= 1.0):
-        print("❌ Error: Confidence threshold must be between 0.0 and 1.0")
-        sys.exit(1)
-    
-    if not (0.1 <= args.resize <= 1.0):
-        print("❌ Error: Resize factor must be between 0.1 and 1.0")
-        sys.exit(1)
+    if args.fast_recognition:
+        config.RECOGNITION_DOWNSCALE = 2
+    config.LOG_LEVEL = args.log_level
     
     # Create and run detector
     detector = RaspberryPiFaceDetector(config)
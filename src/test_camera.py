@@ -12,7 +12,7 @@ print("=" * 50)
 
 # Test 1: Check if picamera2 is installed
 try:
-    from picamera2 import Picamera2
+    from picamera2 import Picamera2, MappedArray
     print("✅ picamera2 is installed")
 except ImportError as e:
     print(f"❌ picamera2 is NOT installed: {e}")
@@ -41,13 +41,24 @@ try:
     # Test capture
     import time
     time.sleep(0.5)  # Give camera time to start
-    frame = picam2.capture_array()
     
-    if frame is not None and frame.size > 0:
-        height, width = frame.shape[:2]
+    # Inspect the camera's own buffer in place (no capture_array() copy), the
+    # same way the detector reads frames; the request is released right after
+    frame_info = None
+    request = picam2.capture_request()
+    try:
+        with MappedArray(request, "main") as mapped:
+            frame = mapped.array
+            if frame is not None and frame.size > 0:
+                frame_info = (frame.shape, frame.dtype)
+    finally:
+        request.release()
+    
+    if frame_info is not None:
+        width, height = config["main"]["size"]
         print(f"✅ Camera capture successful: {width}x{height}")
-        print(f"   Frame shape: {frame.shape}")
-        print(f"   Frame dtype: {frame.dtype}")
+        print(f"   Frame shape: {frame_info[0]}")
+        print(f"   Frame dtype: {frame_info[1]}")
     else:
         print("❌ Camera capture returned empty frame")
         picam2.stop()